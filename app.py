@@ -1,9 +1,10 @@
 import streamlit as st
 import pandas as pd
 from datetime import datetime
-import tempfile
 import os
 from pathlib import Path
+from concurrent.futures import Future, ThreadPoolExecutor
+import hashlib
 
 # Import utilities
 from database.db_manager import DatabaseManager
@@ -31,44 +32,62 @@ def init_managers():
 
 managers = init_managers()
 
+# Shared worker threads for CAD evaluation jobs
+@st.cache_resource
+def get_eval_executor():
+    return ThreadPoolExecutor(max_workers=2)
+
+# Cached reads - amortize DB/filesystem work across Streamlit reruns
+@st.cache_data(ttl=30)
+def _cached_active_experiments():
+    return managers['db'].get_active_experiments()
+
+@st.cache_data(ttl=30)
+def _experiment_options():
+    return {f"{exp['experiment_code']} - {exp['experiment_name']}": exp
+            for exp in _cached_active_experiments()}
+
+@st.cache_data(ttl=30)
+def _cached_storage_stats():
+    return managers['files'].get_storage_stats()
+
+@st.cache_data(ttl=15)
+def _student_subs(uid):
+    return managers['db'].get_student_submissions(uid)
+
+# Result fields shown in the faculty results table, and their column headers
+_RESULT_FIELDS = ('full_name', 'username', 'experiment_code', 'submission_date',
+                  'letter_grade', 'numerical_score', 'mean_deviation')
+_RESULT_HEADERS = ['Student', 'Username', 'Experiment', 'Submitted', 'Grade', 'Score', 'Mean Dev']
+
+# CSV export, regenerated only when the displayed results change. Keyed on the
+# row tuples: every value is hashed (cache_data samples large DataFrames)
+@st.cache_data(show_spinner=False)
+def _results_to_csv(rows):
+    df = pd.DataFrame(list(rows), columns=_RESULT_HEADERS)
+    df['Grade'] = df['Grade'].fillna('Pending')
+    return df.to_csv(index=False).encode()
+
+# Report bytes keyed by modification time, so a rewritten PDF is re-read
+@st.cache_data(show_spinner=False, max_entries=32)
+def load_pdf_bytes(path, mtime):
+    with open(path, 'rb') as f:
+        return f.read()
+
 # Session state initialization
 if 'user' not in st.session_state:
     st.session_state.user = None
 if 'page' not in st.session_state:
     st.session_state.page = 'login'
 
-# Custom CSS
-st.markdown("""
-<style>
-    .main-header {
-        font-size: 2.5rem;
-        color: #1f77b4;
-        text-align: center;
-        margin-bottom: 2rem;
-    }
-    .success-box {
-        padding: 1rem;
-        background-color: #d4edda;
-        border: 1px solid #c3e6cb;
-        border-radius: 5px;
-        color: #155724;
-    }
-    .error-box {
-        padding: 1rem;
-        background-color: #f8d7da;
-        border: 1px solid #f5c6cb;
-        border-radius: 5px;
-        color: #721c24;
-    }
-    .info-box {
-        padding: 1rem;
-        background-color: #d1ecf1;
-        border: 1px solid #bee5eb;
-        border-radius: 5px;
-        color: #0c5460;
-    }
-</style>
-""", unsafe_allow_html=True)
+# Custom CSS - read once per process; it must still be emitted every run,
+# since Streamlit drops elements a rerun does not re-send
+@st.cache_resource
+def _custom_css():
+    css = (Path(__file__).parent / 'assets' / 'style.css').read_text()
+    return f"<style>\n{css}</style>"
+
+st.markdown(_custom_css(), unsafe_allow_html=True)
 
 # ============== AUTHENTICATION FUNCTIONS ==============
 
@@ -81,28 +100,28 @@ def login_page():
     with col2:
         st.subheader("🔐 Login")
         
-        username = st.text_input("Username", key="login_username")
-        password = st.text_input("Password", type="password", key="login_password")
-        
-        col_login, col_register = st.columns(2)
+        # Inside a form, typing does not rerun the script; only Login does
+        with st.form("login_form", clear_on_submit=False):
+            username = st.text_input("Username", key="login_username")
+            password = st.text_input("Password", type="password", key="login_password")
+            
+            submitted = st.form_submit_button("Login", use_container_width=True)
         
-        with col_login:
-            if st.button("Login", use_container_width=True):
-                if username and password:
-                    success, user_data = managers['db'].authenticate_user(username, password)
-                    if success:
-                        st.session_state.user = user_data
-                        st.session_state.page = 'student_dashboard' if user_data['role'] == 'student' else 'faculty_dashboard'
-                        st.rerun()
-                    else:
-                        st.error("Invalid username or password")
+        if submitted:
+            if username and password:
+                success, user_data = managers['db'].authenticate_user(username, password)
+                if success:
+                    st.session_state.user = user_data
+                    st.session_state.page = 'student_dashboard' if user_data['role'] == 'student' else 'faculty_dashboard'
+                    st.rerun()
                 else:
-                    st.warning("Please enter username and password")
+                    st.error("Invalid username or password")
+            else:
+                st.warning("Please enter username and password")
         
-        with col_register:
-            if st.button("Register", use_container_width=True):
-                st.session_state.page = 'register'
-                st.rerun()
+        if st.button("Register", use_container_width=True):
+            st.session_state.page = 'register'
+            st.rerun()
 
 def register_page():
     """Registration page"""
@@ -134,7 +153,9 @@ def register_page():
                 back = st.form_submit_button("Back to Login", use_container_width=True)
             
             if submit:
-                if not all([username, password, full_name, email]):
+                # Whitespace-only input counts as missing
+                username, full_name, email = username.strip(), full_name.strip(), email.strip()
+                if not (username and password and full_name and email):
                     st.error("Please fill all required fields")
                 elif password != confirm_password:
                     st.error("Passwords do not match")
@@ -173,30 +194,35 @@ def student_dashboard():
             st.session_state.page = 'login'
             st.rerun()
     
-    # Tabs
-    tab1, tab2 = st.tabs(["📤 Submit Experiment", "📊 My Results"])
+    # Tabs - only the selected one is rendered, hidden tabs cost nothing per rerun
+    tab = st.radio(
+        "Section",
+        ["📤 Submit Experiment", "📊 My Results"],
+        horizontal=True,
+        label_visibility="collapsed",
+        key='student_tab'
+    )
     
-    with tab1:
+    if tab == "📤 Submit Experiment":
         submit_experiment_tab(user)
-    
-    with tab2:
+    else:
         view_results_tab(user)
 
 def submit_experiment_tab(user):
     """Submit experiment tab for students"""
     st.subheader("📤 Submit Your CAD Model")
     
-    # Get active experiments
-    experiments = managers['db'].get_active_experiments()
+    future = st.session_state.get('eval_future')
+    evaluation_pending = future is not None and not future.done()
     
-    if not experiments:
+    # Get active experiments, keyed by their selectbox label
+    experiment_options = _experiment_options()
+    
+    if not experiment_options:
         st.info("No active experiments available at the moment.")
         return
     
     # Experiment selection
-    experiment_options = {f"{exp['experiment_code']} - {exp['experiment_name']}": exp 
-                         for exp in experiments}
-    
     selected_exp_name = st.selectbox(
         "Select Experiment",
         options=list(experiment_options.keys())
@@ -232,152 +258,225 @@ def submit_experiment_tab(user):
             file_size = uploaded_file.size / (1024 * 1024)  # MB
             st.info(f"📁 **File:** {uploaded_file.name} ({file_size:.2f} MB)")
             
-            if st.button("🚀 Submit for Evaluation", type="primary", use_container_width=True):
-                with st.spinner("Processing your submission..."):
-                    try:
-                        # Save student submission
-                        submission_path, filename = managers['files'].save_student_submission(
-                            uploaded_file,
-                            selected_exp['experiment_code'],
-                            user['username']
-                        )
-                        
-                        # Create submission record
-                        success, submission_id = managers['db'].create_submission(
-                            selected_exp['experiment_id'],
-                            user['user_id'],
-                            submission_path
-                        )
-                        
-                        if not success:
-                            st.error(f"Database error: {submission_id}")
-                            return
-                        
-                        # Evaluate the model
-                        st.info("🔍 Evaluating your CAD model...")
-                        
-                        reference_path = selected_exp['reference_model_path']
-                        
-                        eval_results = managers['evaluator'].evaluate(
-                            reference_path,
-                            submission_path,
-                            num_points=2048
-                        )
-                        
-                        if eval_results['success']:
-                            # Generate PDF report
-                            st.info("📄 Generating PDF report...")
-                            
-                            temp_pdf = tempfile.NamedTemporaryFile(
-                                delete=False, suffix='.pdf'
-                            )
-                            
-                            managers['pdf'].generate_evaluation_report(
-                                temp_pdf.name,
-                                {'full_name': user['full_name'], 
-                                 'username': user['username'],
-                                 'email': user.get('email', 'N/A')},
-                                selected_exp,
-                                eval_results
-                            )
-                            
-                            # Save PDF to permanent storage
-                            pdf_path = managers['files'].save_pdf_report(
-                                temp_pdf.name,
-                                selected_exp['experiment_code'],
-                                user['username']
-                            )
-                            
-                            # Save evaluation results
-                            managers['db'].save_evaluation_result(
-                                submission_id,
-                                eval_results['grade'],
-                                eval_results['feedback'],
-                                pdf_path
-                            )
-                            
-                            # Delete student submission file
-                            success, message = managers['files'].delete_student_submission(submission_path)
-                            
-                            # If STEP file, also delete converted OBJ
-                            if submission_path.lower().endswith(('.step', '.stp')):
-                                converted_path = submission_path.replace('.step', '.obj').replace('.stp', '.obj').replace('.STEP', '.obj').replace('.STP', '.obj')
-                                if os.path.exists(converted_path):
-                                    try:
-                                        os.remove(converted_path)
-                                    except Exception as e:
-                                        st.warning(f"Could not delete converted file: {str(e)}")
-                            
-                            # Clean up temp PDF
-                            os.unlink(temp_pdf.name)
-                            
-                            # Show results
-                            st.success("✅ Evaluation Complete!")
-                            
-                            col1, col2, col3 = st.columns(3)
-                            with col1:
-                                grade = eval_results['grade']['letter_grade']
-                                score = eval_results['grade']['numerical_score']
-                                st.metric("Grade", f"{grade} ({score}%)")
-                            with col2:
-                                mean_dev = eval_results['grade']['mean_deviation']
-                                st.metric("Mean Deviation", f"{mean_dev:.4f}")
-                            with col3:
-                                max_dev = eval_results['grade']['max_deviation']
-                                st.metric("Max Deviation", f"{max_dev:.4f}")
-                            
-                            # Download PDF
-                            with open(pdf_path, 'rb') as f:
-                                st.download_button(
-                                    "📥 Download Full Report (PDF)",
-                                    f.read(),
-                                    file_name=f"{user['username']}_evaluation_report.pdf",
-                                    mime="application/pdf",
-                                    use_container_width=True
-                                )
-                            
-                            # Show feedback
-                            with st.expander("📝 Detailed Feedback", expanded=True):
-                                st.text(eval_results['feedback'])
-                            
-                            # Show 3D visualization heatmap
-                            if 'heatmap' in eval_results:
-                                st.markdown("---")
-                                st.subheader("🎨 3D Accuracy Visualization")
-                                st.plotly_chart(eval_results['heatmap'], use_container_width=True)
-                                st.info("🔍 Red areas = higher deviation, Green areas = better accuracy. Rotate and zoom with mouse.")
-                        
-                        else:
-                            st.error(f"Evaluation failed: {eval_results.get('error', 'Unknown error')}")
-                            managers['db'].update_submission_status(submission_id, 'failed')
+            if st.button("🚀 Submit for Evaluation", type="primary", use_container_width=True,
+                         disabled=evaluation_pending):
+                try:
+                    # Identical resubmission: reuse the stored result instead of re-evaluating
+                    file_hash = hashlib.blake2b(uploaded_file.getbuffer()).hexdigest()
+                    previous = managers['db'].find_submission_by_hash(
+                        user['user_id'], selected_exp['experiment_id'], file_hash
+                    )
+                    if previous:
+                        st.session_state.eval_future = stored_result_future(previous)
+                        st.rerun()
                     
-                    except Exception as e:
-                        st.error(f"Error during submission: {str(e)}")
+                    # Save student submission
+                    submission_path, filename = managers['files'].save_student_submission(
+                        uploaded_file,
+                        selected_exp['experiment_code'],
+                        user['username']
+                    )
+                    
+                    # Create submission record
+                    success, submission_id = managers['db'].create_submission(
+                        selected_exp['experiment_id'],
+                        user['user_id'],
+                        submission_path,
+                        file_hash
+                    )
+                    
+                    if not success:
+                        st.error(f"Database error: {submission_id}")
+                        return
+                    
+                    # Evaluate in the background so the session stays responsive
+                    st.session_state.eval_future = get_eval_executor().submit(
+                        run_evaluation_job, user, selected_exp, submission_path, submission_id
+                    )
+                    _student_subs.clear()
+                    st.rerun()
+                
+                except Exception as e:
+                    st.error(f"Error during submission: {str(e)}")
+    
+    # Evaluation progress / results
+    future = st.session_state.get('eval_future')
+    if future is not None:
+        if not future.done():
+            st.fragment(run_every=2)(poll_evaluation)()
+        else:
+            # Show a finished result once; later reruns start from a clean tab
+            del st.session_state.eval_future
+            show_evaluation_results(user, future)
+
+def run_evaluation_job(user, selected_exp, submission_path, submission_id):
+    """Evaluate a saved submission and store its report (runs on a worker thread)"""
+    warnings = []
+    
+    reference_path = selected_exp['reference_model_path']
+    
+    # Fixed sample count: the nearest-neighbour noise floor depends on it, so
+    # it must not vary between submissions graded against the same thresholds
+    eval_results = managers['evaluator'].evaluate(
+        reference_path,
+        submission_path,
+        num_points=2048
+    )
+    
+    if not eval_results['success']:
+        managers['db'].update_submission_status(submission_id, 'failed')
+        return {'eval_results': eval_results, 'warnings': warnings}
+    
+    # Generate PDF report straight into permanent storage; the rename makes
+    # it appear complete or not at all
+    pdf_path = str(managers['files'].pdf_report_path(
+        selected_exp['experiment_code'],
+        user['username']
+    ))
+    
+    managers['pdf'].generate_evaluation_report(
+        pdf_path + '.tmp',
+        {'full_name': user['full_name'], 
+         'username': user['username'],
+         'email': user.get('email', 'N/A')},
+        selected_exp,
+        eval_results
+    )
+    os.replace(pdf_path + '.tmp', pdf_path)
+    
+    # Save evaluation results
+    managers['db'].save_evaluation_result(
+        submission_id,
+        eval_results['grade'],
+        eval_results['feedback'],
+        pdf_path
+    )
+    
+    # Delete student submission file
+    success, message = managers['files'].delete_student_submission(submission_path)
+    
+    # If STEP file, also delete converted OBJ
+    if submission_path.lower().endswith(('.step', '.stp')):
+        try:
+            Path(submission_path).with_suffix('.obj').unlink(missing_ok=True)
+        except Exception as e:
+            warnings.append(f"Could not delete converted file: {str(e)}")
+    
+    return {'eval_results': eval_results, 'pdf_path': pdf_path, 'warnings': warnings}
+
+def stored_result_future(result):
+    """Wrap a stored evaluation result as a finished job, for show_evaluation_results"""
+    grade_keys = ('letter_grade', 'numerical_score', 'mean_deviation', 'max_deviation',
+                  'std_deviation', 'percentile_95', 'hausdorff_distance')
+    future = Future()
+    future.set_result({
+        'eval_results': {
+            'success': True,
+            'grade': {key: result[key] for key in grade_keys},
+            'feedback': result['detailed_feedback']
+        },
+        'pdf_path': result['pdf_report_path'],
+        'warnings': [],
+        'notice': "This file is identical to your previous submission - showing its stored result."
+    })
+    return future
+
+def poll_evaluation():
+    """Progress placeholder, re-run on a timer until the evaluation finishes"""
+    if st.session_state.eval_future.done():
+        _student_subs.clear()
+        st.rerun()
+    st.info("🔍 Evaluating your CAD model... you can keep using the dashboard meanwhile.")
+
+def show_evaluation_results(user, future):
+    """Render the outcome of a finished evaluation job"""
+    try:
+        job = future.result()
+    except Exception as e:
+        st.error(f"Error during submission: {str(e)}")
+        return
+    
+    eval_results = job['eval_results']
+    if job.get('notice'):
+        st.info(job['notice'])
+    for warning in job['warnings']:
+        st.warning(warning)
+    
+    if not eval_results['success']:
+        st.error(f"Evaluation failed: {eval_results.get('error', 'Unknown error')}")
+        return
+    
+    pdf_path = job['pdf_path']
+    
+    # Show results
+    st.success("✅ Evaluation Complete!")
+    
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        grade = eval_results['grade']['letter_grade']
+        score = eval_results['grade']['numerical_score']
+        st.metric("Grade", f"{grade} ({score}%)")
+    with col2:
+        mean_dev = eval_results['grade']['mean_deviation']
+        st.metric("Mean Deviation", f"{mean_dev:.4f}")
+    with col3:
+        max_dev = eval_results['grade']['max_deviation']
+        st.metric("Max Deviation", f"{max_dev:.4f}")
+    
+    # Download PDF (a stored report may have been cleaned up since)
+    if pdf_path and os.path.exists(pdf_path):
+        st.download_button(
+            "📥 Download Full Report (PDF)",
+            load_pdf_bytes(pdf_path, os.path.getmtime(pdf_path)),
+            file_name=f"{user['username']}_evaluation_report.pdf",
+            mime="application/pdf",
+            use_container_width=True
+        )
+    
+    # Show feedback
+    with st.expander("📝 Detailed Feedback", expanded=True):
+        st.text(eval_results['feedback'])
+    
+    # Show 3D visualization heatmap
+    if 'heatmap' in eval_results:
+        st.markdown("---")
+        st.subheader("🎨 3D Accuracy Visualization")
+        st.plotly_chart(eval_results['heatmap'], use_container_width=True)
+        st.info("🔍 Red areas = higher deviation, Green areas = better accuracy. Rotate and zoom with mouse.")
 
 def view_results_tab(user):
     """View previous results tab"""
     st.subheader("📊 Your Evaluation Results")
     
-    submissions = managers['db'].get_student_submissions(user['user_id'])
+    submissions = _student_subs(user['user_id'])
     
     if not submissions:
         st.info("You haven't submitted any experiments yet.")
         return
     
-    # Create dataframe
-    df_data = []
-    for sub in submissions:
-        df_data.append({
-            'Experiment': sub['experiment_code'],
-            'Name': sub['experiment_name'],
-            'Submitted': sub['submission_date'],
-            'Grade': sub['letter_grade'] if sub['letter_grade'] else 'Pending',
-            'Score': f"{sub['numerical_score']}%" if sub['numerical_score'] else 'N/A',
-            'Status': sub['evaluation_status'].title()
-        })
-    
-    df = pd.DataFrame(df_data)
-    st.dataframe(df, use_container_width=True, hide_index=True)
+    # Rebuild the dataframe only when a submission changed since the last run
+    subs_hash = hash(tuple(
+        (sub['submission_id'], sub['submission_date'], sub['evaluation_status'], sub['numerical_score'])
+        for sub in submissions
+    ))
+    cached = st.session_state.get('subs_df')
+    if cached is not None and cached[0] == subs_hash:
+        df = cached[1]
+    else:
+        df = pd.DataFrame.from_records(submissions, columns=[
+            'experiment_code', 'experiment_name', 'submission_date',
+            'letter_grade', 'numerical_score', 'evaluation_status'
+        ])
+        df['letter_grade'] = df['letter_grade'].fillna('Pending').astype('category')
+        df['evaluation_status'] = df['evaluation_status'].str.title()
+        df.columns = ['Experiment', 'Name', 'Submitted', 'Grade', 'Score', 'Status']
+        st.session_state.subs_df = (subs_hash, df)
+    st.dataframe(
+        df,
+        use_container_width=True,
+        hide_index=True,
+        column_config={'Score': st.column_config.NumberColumn('Score', format='%.0f%%')}
+    )
     
     # Download reports
     st.markdown("---")
@@ -389,13 +488,13 @@ def view_results_tab(user):
             with col1:
                 st.write(f"**{sub['experiment_code']}** - Grade: {sub['letter_grade']} ({sub['numerical_score']}%)")
             with col2:
-                with open(sub['pdf_report_path'], 'rb') as f:
-                    st.download_button(
-                        "📄 PDF",
-                        f.read(),
-                        file_name=f"{sub['experiment_code']}_report.pdf",
-                        key=f"download_{sub['submission_id']}"
-                    )
+                pdf_path = sub['pdf_report_path']
+                st.download_button(
+                    "📄 PDF",
+                    load_pdf_bytes(pdf_path, os.path.getmtime(pdf_path)),
+                    file_name=f"{sub['experiment_code']}_report.pdf",
+                    key=f"download_{sub['submission_id']}"
+                )
 
 # ============== FACULTY PAGES ==============
 
@@ -412,7 +511,7 @@ def faculty_dashboard():
         st.markdown(f"**Role:** {user['role'].title()}")
         
         # Storage stats
-        stats = managers['files'].get_storage_stats()
+        stats = _cached_storage_stats()
         st.markdown("---")
         st.markdown("**💾 Storage Usage**")
         st.write(f"Experiments: {stats['experiments']} MB")
@@ -425,24 +524,27 @@ def faculty_dashboard():
             st.session_state.page = 'login'
             st.rerun()
     
-    # Tabs
-    tab1, tab2, tab3, tab4 = st.tabs([
-        "📤 Create Experiment",
-        "📊 View All Results",
-        "⚙️ Manage Experiments",
-        "👥 Manage Users"
-    ])
+    # Tabs - only the selected one is rendered, hidden tabs cost nothing per rerun
+    tab = st.radio(
+        "Section",
+        [
+            "📤 Create Experiment",
+            "📊 View All Results",
+            "⚙️ Manage Experiments",
+            "👥 Manage Users"
+        ],
+        horizontal=True,
+        label_visibility="collapsed",
+        key='faculty_tab'
+    )
     
-    with tab1:
+    if tab == "📤 Create Experiment":
         create_experiment_tab(user)
-    
-    with tab2:
+    elif tab == "📊 View All Results":
         view_all_results_tab(user)
-    
-    with tab3:
+    elif tab == "⚙️ Manage Experiments":
         manage_experiments_tab(user)
-    
-    with tab4:
+    else:
         manage_users_tab(user)
 
 def create_experiment_tab(user):
@@ -480,7 +582,9 @@ def create_experiment_tab(user):
         submit = st.form_submit_button("🚀 Create Experiment", use_container_width=True)
         
         if submit:
-            if not all([exp_code, exp_name, reference_file]):
+            # Whitespace-only input counts as missing
+            exp_code, exp_name = exp_code.strip(), exp_name.strip()
+            if not (exp_code and exp_name and reference_file):
                 st.error("Please fill all required fields and upload reference model")
             else:
                 try:
@@ -512,6 +616,9 @@ def create_experiment_tab(user):
                         )
                         
                         if success:
+                            _cached_active_experiments.clear()
+                            _experiment_options.clear()
+                            _cached_storage_stats.clear()
                             st.success(f"✅ Experiment '{exp_code}' created successfully!")
                             st.balloons()
                         else:
@@ -533,7 +640,7 @@ def view_all_results_tab(user):
     # Filters
     col1, col2, col3 = st.columns(3)
     
-    experiments = list(set([r['experiment_code'] for r in results]))
+    experiments = sorted(dict.fromkeys(r['experiment_code'] for r in results))
     
     with col1:
         filter_exp = st.selectbox("Filter by Experiment", ['All'] + experiments)
@@ -549,46 +656,49 @@ def view_all_results_tab(user):
         filtered_results = [r for r in filtered_results if r['letter_grade'] == filter_grade]
     
     # Create DataFrame
-    df_data = []
-    for r in filtered_results:
-        df_data.append({
-            'Student': r['full_name'],
-            'Username': r['username'],
-            'Experiment': r['experiment_code'],
-            'Submitted': r['submission_date'],
-            'Grade': r['letter_grade'] if r['letter_grade'] else 'Pending',
-            'Score': f"{r['numerical_score']}%" if r['numerical_score'] else 'N/A',
-            'Mean Dev': f"{r['mean_deviation']:.4f}" if r['mean_deviation'] else 'N/A'
-        })
-    
-    df = pd.DataFrame(df_data)
-    st.dataframe(df, use_container_width=True, hide_index=True)
+    df = pd.DataFrame.from_records(filtered_results, columns=_RESULT_FIELDS)
+    
+    # Evaluated rows for the statistics, taken before pending grades are filled in
+    evaluated_mask = df['numerical_score'].notna()
+    scores = df.loc[evaluated_mask, 'numerical_score']
+    grades = df.loc[evaluated_mask, 'letter_grade']
+    
+    df['letter_grade'] = df['letter_grade'].fillna('Pending').astype('category')
+    df.columns = _RESULT_HEADERS
+    
+    # Numbers stay numeric (sortable); formatting happens in the browser
+    st.dataframe(
+        df,
+        use_container_width=True,
+        hide_index=True,
+        column_config={
+            'Score': st.column_config.NumberColumn('Score', format='%.0f%%'),
+            'Mean Dev': st.column_config.NumberColumn('Mean Dev', format='%.4f')
+        }
+    )
     
     # Statistics
     st.markdown("---")
     col1, col2, col3, col4 = st.columns(4)
     
-    evaluated = [r for r in filtered_results if r['numerical_score'] is not None]
-    
     with col1:
-        st.metric("Total Submissions", len(filtered_results))
+        st.metric("Total Submissions", len(df))
     with col2:
-        st.metric("Evaluated", len(evaluated))
+        st.metric("Evaluated", len(scores))
     with col3:
-        if evaluated:
-            avg_score = sum([r['numerical_score'] for r in evaluated]) / len(evaluated)
+        if not scores.empty:
+            avg_score = scores.mean()
             st.metric("Average Score", f"{avg_score:.1f}%")
     with col4:
-        if evaluated:
-            grade_dist = {}
-            for r in evaluated:
-                grade_dist[r['letter_grade']] = grade_dist.get(r['letter_grade'], 0) + 1
-            most_common = max(grade_dist, key=grade_dist.get)
+        if not grades.empty:
+            most_common = grades.mode().iat[0]
             st.metric("Most Common Grade", most_common)
     
     # Export to CSV
-    if df_data:
-        csv = df.to_csv(index=False)
+    if not df.empty:
+        csv = _results_to_csv(tuple(
+            tuple(r.get(field) for field in _RESULT_FIELDS) for r in filtered_results
+        ))
         st.download_button(
             "📥 Export to CSV",
             csv,
@@ -600,7 +710,7 @@ def manage_experiments_tab(user):
     """Manage experiments tab"""
     st.subheader("⚙️ Manage Experiments")
     
-    experiments = managers['db'].get_active_experiments()
+    experiments = _cached_active_experiments()
     
     if not experiments:
         st.info("No experiments created yet.")
@@ -1,197 +1,474 @@
 import sqlite3
 import bcrypt
+import hashlib
 import json
-from datetime import datetime
+import os
+import queue
+import threading
+import atexit
+import multiprocessing
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime, timezone
 from pathlib import Path
 
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "10"))
+LOG_BATCH_SIZE = 256
+LOG_FLUSH_INTERVAL = 0.2  # seconds of idle time before a partial batch is written
+CHECKPOINT_EVERY_N_FLUSHES = 100
+LOG_WRITE_ATTEMPTS = 4  # tries per audit log batch before it is dropped
+LOG_RETRY_BACKOFF = 0.1  # seconds before the first retry, doubled each time
+STATEMENT_CACHE_SIZE = 256
+USER_CACHE_SIZE = 4096
+USER_CACHE_TTL = 300  # seconds
+VERIFIED_CACHE_TTL = 60  # seconds a checked password skips bcrypt
+POOL_SIZE = 25  # idle connections kept open
+
+# Letter grade -> experiments column holding its upper deviation bound (F is unbounded)
+THRESHOLD_COLUMNS = {'A': 'threshold_a', 'B': 'threshold_b', 'C': 'threshold_c', 'D': 'threshold_d'}
+
+# Hot statements, kept as constants so each call hits the prepared-statement cache
+_SQL_AUTH = 'SELECT user_id, password_hash, role, full_name FROM users WHERE username = ?'
+
+_SQL_INSERT_AUDIT = '''
+    INSERT INTO audit_log (user_id, action, details, timestamp)
+    VALUES (?, ?, ?, ?)
+'''
+
+_SQL_UPSERT_SUBMISSION = '''
+    INSERT INTO submissions (experiment_id, student_id, submission_file_path, file_hash)
+    VALUES (?, ?, ?, ?)
+    ON CONFLICT(experiment_id, student_id) DO UPDATE SET
+        submission_file_path = excluded.submission_file_path,
+        file_hash = excluded.file_hash,
+        submission_date = CURRENT_TIMESTAMP,
+        evaluation_status = 'pending'
+    RETURNING submission_id
+'''
+
+_SQL_INSERT_RESULT = '''
+    INSERT INTO evaluation_results 
+    (submission_id, letter_grade, numerical_score, mean_deviation, max_deviation,
+     std_deviation, percentile_95, hausdorff_distance, detailed_feedback, pdf_report_path)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+'''
+
+_SQL_RESULT_BY_HASH = '''
+    SELECT s.submission_id, er.letter_grade, er.numerical_score, er.mean_deviation,
+           er.max_deviation, er.std_deviation, er.percentile_95, er.hausdorff_distance,
+           er.detailed_feedback, er.pdf_report_path
+    FROM submissions s
+    JOIN evaluation_results er ON er.result_id = (
+        SELECT MAX(result_id) FROM evaluation_results
+        WHERE submission_id = s.submission_id
+    )
+    WHERE s.student_id = ? AND s.experiment_id = ? AND s.file_hash = ?
+      AND s.evaluation_status = 'evaluated'
+'''
+
+_SQL_ACTIVE_EXPERIMENTS = '''
+    SELECT e.*, u.full_name as creator_name
+    FROM experiments e
+    JOIN users u ON e.created_by = u.user_id
+    WHERE e.is_active = 1
+    ORDER BY e.created_at DESC
+'''
+
+_SQL_STUDENT_SUBMISSIONS = '''
+    SELECT s.*, e.experiment_name, e.experiment_code,
+           er.letter_grade, er.numerical_score, er.pdf_report_path
+    FROM submissions s
+    JOIN experiments e ON s.experiment_id = e.experiment_id
+    LEFT JOIN evaluation_results er ON er.result_id = (
+        SELECT MAX(result_id) FROM evaluation_results
+        WHERE submission_id = s.submission_id
+    )
+    WHERE s.student_id = ?
+    ORDER BY s.submission_date DESC
+'''
+
+_SQL_FACULTY_RESULTS = '''
+    SELECT u.username, u.full_name, u.email,
+           e.experiment_code, e.experiment_name,
+           s.submission_date,
+           er.letter_grade, er.numerical_score,
+           er.mean_deviation, er.pdf_report_path,
+           er.evaluated_at
+    FROM users u
+    JOIN submissions s ON u.user_id = s.student_id
+    JOIN experiments e ON s.experiment_id = e.experiment_id
+    LEFT JOIN evaluation_results er ON er.result_id = (
+        SELECT MAX(result_id) FROM evaluation_results
+        WHERE submission_id = s.submission_id
+    )
+    WHERE u.role = 'student'
+'''
+_SQL_FACULTY_RESULTS_ALL = _SQL_FACULTY_RESULTS + ' ORDER BY s.submission_date DESC'
+_SQL_FACULTY_RESULTS_BY_CREATOR = _SQL_FACULTY_RESULTS + ' AND e.created_by = ? ORDER BY s.submission_date DESC'
+
+# Full schema, sent to SQLite in a single executescript() call
+_SCHEMA_SQL = '''
+-- Users table
+CREATE TABLE IF NOT EXISTS users (
+    user_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    username TEXT UNIQUE NOT NULL,
+    password_hash TEXT NOT NULL,
+    full_name TEXT NOT NULL,
+    email TEXT UNIQUE NOT NULL,
+    role TEXT NOT NULL CHECK(role IN ('faculty', 'student')),
+    department TEXT,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Experiments table
+CREATE TABLE IF NOT EXISTS experiments (
+    experiment_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    experiment_code TEXT NOT NULL,
+    experiment_name TEXT NOT NULL,
+    description TEXT,
+    reference_model_path TEXT NOT NULL,
+    created_by INTEGER NOT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    deadline TEXT,
+    is_active BOOLEAN DEFAULT 1,
+    grading_thresholds TEXT,
+    threshold_a REAL,
+    threshold_b REAL,
+    threshold_c REAL,
+    threshold_d REAL,
+    FOREIGN KEY (created_by) REFERENCES users(user_id)
+);
+
+-- Submissions table
+CREATE TABLE IF NOT EXISTS submissions (
+    submission_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    experiment_id INTEGER NOT NULL,
+    student_id INTEGER NOT NULL,
+    submission_file_path TEXT,
+    submission_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    evaluation_status TEXT DEFAULT 'pending',
+    file_hash TEXT,
+    FOREIGN KEY (experiment_id) REFERENCES experiments(experiment_id),
+    FOREIGN KEY (student_id) REFERENCES users(user_id),
+    UNIQUE(experiment_id, student_id)
+);
+
+-- Evaluation results table
+CREATE TABLE IF NOT EXISTS evaluation_results (
+    result_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    submission_id INTEGER NOT NULL,
+    letter_grade TEXT NOT NULL,
+    numerical_score REAL NOT NULL,
+    mean_deviation REAL,
+    max_deviation REAL,
+    std_deviation REAL,
+    percentile_95 REAL,
+    hausdorff_distance REAL,
+    detailed_feedback TEXT,
+    pdf_report_path TEXT,
+    evaluated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    FOREIGN KEY (submission_id) REFERENCES submissions(submission_id)
+);
+
+-- Audit log
+CREATE TABLE IF NOT EXISTS audit_log (
+    log_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id INTEGER,
+    action TEXT NOT NULL,
+    details TEXT,
+    timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    FOREIGN KEY (user_id) REFERENCES users(user_id)
+);
+
+-- Indexes for hot lookup columns
+CREATE INDEX IF NOT EXISTS idx_submissions_student ON submissions(student_id);
+CREATE INDEX IF NOT EXISTS idx_results_submission ON evaluation_results(submission_id);
+CREATE INDEX IF NOT EXISTS idx_experiments_creator_active ON experiments(created_by, is_active);
+CREATE INDEX IF NOT EXISTS idx_audit_ts ON audit_log(timestamp DESC);
+
+-- Partial index covering only the (small) set of unevaluated submissions
+CREATE INDEX IF NOT EXISTS idx_submissions_pending ON submissions(submission_date)
+    WHERE evaluation_status = 'pending';
+
+-- Redundant with the UNIQUE autoindexes (users.username, submissions(experiment_id, student_id));
+-- dropped from databases created while they existed
+DROP INDEX IF EXISTS idx_users_username;
+DROP INDEX IF EXISTS idx_submissions_experiment;
+'''
+
+class _TTLCache:
+    """Small thread-safe LRU cache whose entries expire after a TTL"""
+    
+    def __init__(self, maxsize, ttl):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def get(self, key):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            value, expires = item
+            if expires < time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+    
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = (value, time.monotonic() + self.ttl)
+            self._data.move_to_end(key)
+            if len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+    
+    def pop(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
 class DatabaseManager:
-    """Cloud-compatible database manager for CAD evaluation system"""
+    """Cloud-compatible database manager for CAD evaluation system
+    
+    One instance is shared by all sessions (init_managers). Page code should read
+    active experiments through app._cached_active_experiments, not directly.
+    """
     
     def __init__(self, db_path='database/cad_evaluation.db'):
         self.db_path = db_path
         # Ensure database directory exists
         Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+        
+        # bcrypt is CPU-bound; worker processes (started on first use) scale it across cores.
+        # Never fork them from this multi-threaded server: a forked child can
+        # inherit a lock held by another thread and deadlock
+        start_method = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+        self._bcrypt_pool = ProcessPoolExecutor(
+            max_workers=os.cpu_count(),
+            mp_context=multiprocessing.get_context(start_method)
+        )
+        
+        # Idle connections shared by all sessions; Streamlit runs every rerun on a
+        # fresh thread, so per-thread connections would be reopened each time
+        self._pool = queue.LifoQueue(maxsize=POOL_SIZE)
+        # Connection checked out by the current thread, so nested calls reuse it
+        self._tls = threading.local()
+        
+        # username -> (user_id, password_hash, role, full_name)
+        self._user_cache = _TTLCache(USER_CACHE_SIZE, USER_CACHE_TTL)
+        # sha256(password_hash + password) of recently verified logins, so a
+        # double-submitted login form does not pay for bcrypt twice
+        self._verified_cache = _TTLCache(USER_CACHE_SIZE, VERIFIED_CACHE_TTL)
+        
         self.init_database()
+        
+        # Audit log rows are buffered and written in batches by a background thread
+        self._log_queue = queue.Queue()
+        self._log_thread = threading.Thread(target=self._log_writer, daemon=True)
+        self._log_thread.start()
+        atexit.register(self.flush_audit_log)
     
     def get_connection(self):
-        """Get database connection"""
-        return sqlite3.connect(self.db_path, check_same_thread=False)
+        """Open a new configured database connection"""
+        # Pooled connections move between threads, one holder at a time
+        conn = sqlite3.connect(self.db_path, cached_statements=STATEMENT_CACHE_SIZE,
+                               check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        # Autocommit: reads skip the implicit BEGIN, multi-statement writes
+        # open explicit transactions
+        conn.isolation_level = None
+        self._configure_connection(conn)
+        return conn
     
-    def init_database(self):
-        """Initialize database with schema"""
-        conn = self.get_connection()
+    def _configure_connection(self, conn):
+        """Apply per-connection PRAGMAs"""
         cursor = conn.cursor()
+        cursor.execute('PRAGMA synchronous=NORMAL')
+        cursor.execute('PRAGMA cache_size=-64000')
+        cursor.execute('PRAGMA temp_store=MEMORY')
+        cursor.execute('PRAGMA mmap_size=268435456')
+        cursor.execute('PRAGMA foreign_keys=ON')
+    
+    @contextmanager
+    def _conn(self):
+        """Borrow a pooled connection, rolling back anything left uncommitted"""
+        conn = getattr(self._tls, 'conn', None)
+        if conn is not None:
+            yield conn
+            return
         
-        # Users table
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS users (
-                user_id INTEGER PRIMARY KEY AUTOINCREMENT,
-                username TEXT UNIQUE NOT NULL,
-                password_hash TEXT NOT NULL,
-                full_name TEXT NOT NULL,
-                email TEXT UNIQUE NOT NULL,
-                role TEXT NOT NULL CHECK(role IN ('faculty', 'student')),
-                department TEXT,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        ''')
+        try:
+            conn = self._pool.get_nowait()
+        except queue.Empty:
+            conn = self.get_connection()
+        self._tls.conn = conn
+        try:
+            yield conn
+        finally:
+            self._tls.conn = None
+            try:
+                if conn.in_transaction:
+                    conn.rollback()
+                self._pool.put_nowait(conn)
+            except (sqlite3.Error, queue.Full):
+                # Unusable or surplus connection, drop it
+                conn.close()
+    
+    def _hash_password(self, password):
+        """Hash a password on the bcrypt process pool"""
+        salt = bcrypt.gensalt(rounds=BCRYPT_ROUNDS)
+        return self._bcrypt_pool.submit(bcrypt.hashpw, password.encode('utf-8'), salt).result()
+    
+    def _check_password(self, password, password_hash):
+        """Verify a password on the bcrypt process pool"""
+        # Keyed on the stored hash too, so a password change invalidates the entry
+        key = hashlib.sha256(password_hash + password.encode('utf-8')).digest()
+        if self._verified_cache.get(key):
+            return True
         
-        # Experiments table
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS experiments (
-                experiment_id INTEGER PRIMARY KEY AUTOINCREMENT,
-                experiment_code TEXT NOT NULL,
-                experiment_name TEXT NOT NULL,
-                description TEXT,
-                reference_model_path TEXT NOT NULL,
-                created_by INTEGER NOT NULL,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                deadline TEXT,
-                is_active BOOLEAN DEFAULT 1,
-                grading_thresholds TEXT,
-                FOREIGN KEY (created_by) REFERENCES users(user_id)
-            )
-        ''')
+        valid = self._bcrypt_pool.submit(bcrypt.checkpw, password.encode('utf-8'), password_hash).result()
+        if valid:
+            self._verified_cache.set(key, True)
+        return valid
+    
+    def init_database(self):
+        """Initialize database with schema"""
+        with self._conn() as conn:
+            self._create_schema(conn)
         
-        # Submissions table
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS submissions (
-                submission_id INTEGER PRIMARY KEY AUTOINCREMENT,
-                experiment_id INTEGER NOT NULL,
-                student_id INTEGER NOT NULL,
-                submission_file_path TEXT,
-                submission_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                evaluation_status TEXT DEFAULT 'pending',
-                FOREIGN KEY (experiment_id) REFERENCES experiments(experiment_id),
-                FOREIGN KEY (student_id) REFERENCES users(user_id),
-                UNIQUE(experiment_id, student_id)
-            )
-        ''')
+        # Create default admin user if not exists
+        self.create_default_admin()
+    
+    def _create_schema(self, conn):
+        """Create tables if they do not exist"""
+        cursor = conn.cursor()
         
-        # Evaluation results table
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS evaluation_results (
-                result_id INTEGER PRIMARY KEY AUTOINCREMENT,
-                submission_id INTEGER NOT NULL,
-                letter_grade TEXT NOT NULL,
-                numerical_score REAL NOT NULL,
-                mean_deviation REAL,
-                max_deviation REAL,
-                std_deviation REAL,
-                percentile_95 REAL,
-                hausdorff_distance REAL,
-                detailed_feedback TEXT,
-                pdf_report_path TEXT,
-                evaluated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (submission_id) REFERENCES submissions(submission_id)
-            )
-        ''')
+        # Only takes effect on a new, empty database (must precede the first CREATE TABLE)
+        cursor.execute('PRAGMA auto_vacuum=INCREMENTAL')
         
-        # Audit log
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS audit_log (
-                log_id INTEGER PRIMARY KEY AUTOINCREMENT,
-                user_id INTEGER,
-                action TEXT NOT NULL,
-                details TEXT,
-                timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (user_id) REFERENCES users(user_id)
-            )
-        ''')
+        # WAL lets readers proceed while evaluations are written (persists database-wide)
+        cursor.execute('PRAGMA journal_mode=WAL')
         
-        conn.commit()
-        conn.close()
+        cursor.executescript(_SCHEMA_SQL)
+        self._migrate_schema(cursor)
         
-        # Create default admin user if not exists
-        self.create_default_admin()
+        # Refresh planner statistics only where SQLite judges them stale,
+        # instead of a full ANALYZE on every start
+        cursor.execute('PRAGMA optimize')
+    
+    def _migrate_schema(self, cursor):
+        """Bring databases created by older versions up to the current schema"""
+        cursor.execute('PRAGMA table_info(experiments)')
+        columns = {row['name'] for row in cursor.fetchall()}
+        if 'threshold_a' not in columns:
+            # Grading thresholds moved from a JSON column to fixed REAL columns
+            cursor.execute('BEGIN IMMEDIATE')
+            for col in THRESHOLD_COLUMNS.values():
+                cursor.execute(f'ALTER TABLE experiments ADD COLUMN {col} REAL')
+            cursor.execute('SELECT experiment_id, grading_thresholds FROM experiments '
+                           'WHERE grading_thresholds IS NOT NULL')
+            for experiment_id, thresholds_json in cursor.fetchall():
+                thresholds = json.loads(thresholds_json)
+                cursor.execute('''
+                    UPDATE experiments SET threshold_a = ?, threshold_b = ?, threshold_c = ?, threshold_d = ?
+                    WHERE experiment_id = ?
+                ''', (*(thresholds.get(grade) for grade in THRESHOLD_COLUMNS), experiment_id))
+            cursor.execute('COMMIT')
+        
+        cursor.execute('PRAGMA table_info(submissions)')
+        columns = {row['name'] for row in cursor.fetchall()}
+        if 'file_hash' not in columns:
+            # Content hash of the uploaded file, for detecting identical resubmissions
+            cursor.execute('ALTER TABLE submissions ADD COLUMN file_hash TEXT')
     
     def create_default_admin(self):
         """Create default admin account"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute('SELECT COUNT(*) FROM users WHERE role = ?', ('faculty',))
-        if cursor.fetchone()[0] == 0:
-            # Create default admin
-            password_hash = bcrypt.hashpw('admin123'.encode('utf-8'), bcrypt.gensalt())
+        with self._conn() as conn:
+            cursor = conn.cursor()
+            
+            cursor.execute('SELECT 1 FROM users WHERE role = ? LIMIT 1', ('faculty',))
+            if cursor.fetchone() is not None:
+                # Warm boot: skip the bcrypt cost entirely
+                return
+            
+            # Create default admin (idempotent if another process raced us)
+            password_hash = self._hash_password('admin123')
             cursor.execute('''
                 INSERT INTO users (username, password_hash, full_name, email, role, department)
                 VALUES (?, ?, ?, ?, ?, ?)
+                ON CONFLICT DO NOTHING
             ''', ('admin', password_hash, 'System Administrator', 'admin@university.edu', 'faculty', 'Engineering'))
-            conn.commit()
-        
-        conn.close()
     
     def reset_user_password(self, user_id, new_password):
         """Reset a user's password (admin function)"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
-        
         try:
-            password_hash = bcrypt.hashpw(new_password.encode('utf-8'), bcrypt.gensalt())
-            cursor.execute('UPDATE users SET password_hash = ? WHERE user_id = ?', 
-                          (password_hash, user_id))
-            conn.commit()
+            password_hash = self._hash_password(new_password)
+            with self._conn() as conn:
+                cursor = conn.cursor()
+                cursor.execute('BEGIN IMMEDIATE')
+                cursor.execute('UPDATE users SET password_hash = ? WHERE user_id = ? RETURNING username', 
+                              (password_hash, user_id))
+                row = cursor.fetchone()
+                cursor.execute('COMMIT')
             
-            # Get username for logging
-            cursor.execute('SELECT username FROM users WHERE user_id = ?', (user_id,))
-            username = cursor.fetchone()[0]
+            if row is None:
+                return False, "User not found"
             
-            self.log_action(user_id, 'password_reset', f'Password reset by admin for user: {username}')
+            self._user_cache.pop(row[0])
+            self.log_action(user_id, 'password_reset', f'Password reset by admin for user: {row[0]}')
             return True, "Password reset successfully"
         except Exception as e:
             return False, str(e)
-        finally:
-            conn.close()
     
     def get_all_students(self):
         """Get all student users"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            SELECT user_id, username, full_name, email, department, created_at
-            FROM users
-            WHERE role = 'student'
-            ORDER BY full_name
-        ''')
-        
-        columns = [desc[0] for desc in cursor.description]
-        results = [dict(zip(columns, row)) for row in cursor.fetchall()]
-        conn.close()
+        with self._conn() as conn:
+            cursor = conn.cursor()
+            
+            cursor.execute('''
+                SELECT user_id, username, full_name, email, department, created_at
+                FROM users
+                WHERE role = 'student'
+                ORDER BY full_name
+            ''')
+            
+            results = [dict(row) for row in cursor.fetchall()]
         return results
     
     # USER MANAGEMENT
     def register_user(self, username, password, full_name, email, role='student', department=None):
         """Register new user"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
-        
         try:
-            password_hash = bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt())
-            cursor.execute('''
-                INSERT INTO users (username, password_hash, full_name, email, role, department)
-                VALUES (?, ?, ?, ?, ?, ?)
-            ''', (username, password_hash, full_name, email, role, department))
-            conn.commit()
-            user_id = cursor.lastrowid
+            password_hash = self._hash_password(password)
+            with self._conn() as conn:
+                cursor = conn.cursor()
+                cursor.execute('''
+                    INSERT INTO users (username, password_hash, full_name, email, role, department)
+                    VALUES (?, ?, ?, ?, ?, ?)
+                ''', (username, password_hash, full_name, email, role, department))
+                user_id = cursor.lastrowid
+            self._user_cache.pop(username)
             self.log_action(user_id, 'user_registered', f'New {role} registered: {username}')
             return True, user_id
         except sqlite3.IntegrityError as e:
             return False, str(e)
-        finally:
-            conn.close()
     
     def authenticate_user(self, username, password):
         """Authenticate user login"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute('SELECT user_id, password_hash, role, full_name FROM users WHERE username = ?', (username,))
-        result = cursor.fetchone()
-        conn.close()
+        result = self._user_cache.get(username)
+        if result is None:
+            with self._conn() as conn:
+                cursor = conn.cursor()
+                cursor.execute(_SQL_AUTH, (username,))
+                result = cursor.fetchone()
+            if result is not None:
+                result = tuple(result)
+                self._user_cache.set(username, result)
         
-        if result and bcrypt.checkpw(password.encode('utf-8'), result[1]):
+        if result and self._check_password(password, result[1]):
             self.log_action(result[0], 'user_login', f'User {username} logged in')
             return True, {'user_id': result[0], 'role': result[2], 'full_name': result[3], 'username': username}
         return False, None
@@ -200,183 +477,193 @@ class DatabaseManager:
     def create_experiment(self, experiment_code, experiment_name, description, 
                          reference_model_path, created_by, deadline=None, grading_thresholds=None):
         """Create new experiment"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
-        
         try:
-            thresholds_json = json.dumps(grading_thresholds) if grading_thresholds else None
-            cursor.execute('''
-                INSERT INTO experiments (experiment_code, experiment_name, description, 
-                                       reference_model_path, created_by, deadline, grading_thresholds)
-                VALUES (?, ?, ?, ?, ?, ?, ?)
-            ''', (experiment_code, experiment_name, description, reference_model_path, 
-                  created_by, deadline, thresholds_json))
-            conn.commit()
-            experiment_id = cursor.lastrowid
+            thresholds = grading_thresholds or {}
+            with self._conn() as conn:
+                cursor = conn.cursor()
+                cursor.execute('''
+                    INSERT INTO experiments (experiment_code, experiment_name, description, 
+                                           reference_model_path, created_by, deadline,
+                                           threshold_a, threshold_b, threshold_c, threshold_d)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ''', (experiment_code, experiment_name, description, reference_model_path, 
+                      created_by, deadline, *(thresholds.get(grade) for grade in THRESHOLD_COLUMNS)))
+                experiment_id = cursor.lastrowid
             self.log_action(created_by, 'experiment_created', f'Created experiment: {experiment_code}')
             return True, experiment_id
         except sqlite3.IntegrityError as e:
             return False, str(e)
-        finally:
-            conn.close()
     
     def get_active_experiments(self):
         """Get all active experiments"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            SELECT e.*, u.full_name as creator_name
-            FROM experiments e
-            JOIN users u ON e.created_by = u.user_id
-            WHERE e.is_active = 1
-            ORDER BY e.created_at DESC
-        ''')
-        
-        columns = [desc[0] for desc in cursor.description]
-        results = [dict(zip(columns, row)) for row in cursor.fetchall()]
-        conn.close()
+        with self._conn() as conn:
+            cursor = conn.cursor()
+            cursor.execute(_SQL_ACTIVE_EXPERIMENTS)
+            
+            results = [dict(row) for row in cursor.fetchall()]
         return results
     
     def get_experiment_by_id(self, experiment_id):
         """Get experiment details"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute('SELECT * FROM experiments WHERE experiment_id = ?', (experiment_id,))
-        columns = [desc[0] for desc in cursor.description]
-        result = cursor.fetchone()
-        conn.close()
+        with self._conn() as conn:
+            cursor = conn.cursor()
+            cursor.execute('SELECT * FROM experiments WHERE experiment_id = ?', (experiment_id,))
+            result = cursor.fetchone()
         
-        return dict(zip(columns, result)) if result else None
+        return dict(result) if result else None
     
     # SUBMISSION MANAGEMENT
-    def create_submission(self, experiment_id, student_id, submission_file_path):
+    def create_submission(self, experiment_id, student_id, submission_file_path, file_hash=None):
         """Create or update student submission"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
-        
         try:
-            cursor.execute('''
-                INSERT OR REPLACE INTO submissions 
-                (experiment_id, student_id, submission_file_path, submission_date, evaluation_status)
-                VALUES (?, ?, ?, CURRENT_TIMESTAMP, 'pending')
-            ''', (experiment_id, student_id, submission_file_path))
-            conn.commit()
-            submission_id = cursor.lastrowid
+            with self._conn() as conn:
+                cursor = conn.cursor()
+                # Update in place so submission_id (and its result history) is preserved
+                cursor.execute('BEGIN IMMEDIATE')
+                cursor.execute(_SQL_UPSERT_SUBMISSION,
+                               (experiment_id, student_id, submission_file_path, file_hash))
+                submission_id = cursor.fetchone()[0]
+                cursor.execute('COMMIT')
             self.log_action(student_id, 'submission_created', 
                           f'Submitted for experiment ID: {experiment_id}')
             return True, submission_id
         except Exception as e:
             return False, str(e)
-        finally:
-            conn.close()
+    
+    def find_submission_by_hash(self, student_id, experiment_id, file_hash):
+        """Get the latest result of an evaluated submission with this file hash, if any"""
+        with self._conn() as conn:
+            cursor = conn.cursor()
+            cursor.execute(_SQL_RESULT_BY_HASH, (student_id, experiment_id, file_hash))
+            row = cursor.fetchone()
+        return dict(row) if row else None
     
     def get_student_submissions(self, student_id):
         """Get all submissions for a student"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            SELECT s.*, e.experiment_name, e.experiment_code,
-                   er.letter_grade, er.numerical_score, er.pdf_report_path
-            FROM submissions s
-            JOIN experiments e ON s.experiment_id = e.experiment_id
-            LEFT JOIN evaluation_results er ON s.submission_id = er.submission_id
-            WHERE s.student_id = ?
-            ORDER BY s.submission_date DESC
-        ''', (student_id,))
-        
-        columns = [desc[0] for desc in cursor.description]
-        results = [dict(zip(columns, row)) for row in cursor.fetchall()]
-        conn.close()
+        with self._conn() as conn:
+            cursor = conn.cursor()
+            cursor.execute(_SQL_STUDENT_SUBMISSIONS, (student_id,))
+            
+            results = [dict(row) for row in cursor.fetchall()]
         return results
     
     def update_submission_status(self, submission_id, status):
         """Update submission evaluation status"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
-        cursor.execute('UPDATE submissions SET evaluation_status = ? WHERE submission_id = ?', 
-                      (status, submission_id))
-        conn.commit()
-        conn.close()
+        with self._conn() as conn:
+            cursor = conn.cursor()
+            cursor.execute('UPDATE submissions SET evaluation_status = ? WHERE submission_id = ?', 
+                          (status, submission_id))
     
     # EVALUATION RESULTS
     def save_evaluation_result(self, submission_id, grade_data, feedback, pdf_path):
-        """Save evaluation results"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            INSERT INTO evaluation_results 
-            (submission_id, letter_grade, numerical_score, mean_deviation, max_deviation,
-             std_deviation, percentile_95, hausdorff_distance, detailed_feedback, pdf_report_path)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        ''', (submission_id, grade_data['letter_grade'], grade_data['numerical_score'],
-              grade_data.get('mean_deviation'), grade_data.get('max_deviation'),
-              grade_data.get('std_deviation'), grade_data.get('percentile_95'),
-              grade_data.get('hausdorff_distance'), feedback, pdf_path))
-        
-        conn.commit()
-        conn.close()
-        self.update_submission_status(submission_id, 'evaluated')
+        """Save evaluation results and mark the submission evaluated atomically"""
+        with self._conn() as conn:
+            cursor = conn.cursor()
+            
+            cursor.execute('BEGIN IMMEDIATE')
+            cursor.execute(_SQL_INSERT_RESULT, (
+                submission_id, grade_data['letter_grade'], grade_data['numerical_score'],
+                grade_data.get('mean_deviation'), grade_data.get('max_deviation'),
+                grade_data.get('std_deviation'), grade_data.get('percentile_95'),
+                grade_data.get('hausdorff_distance'), feedback, pdf_path))
+            cursor.execute('UPDATE submissions SET evaluation_status = ? WHERE submission_id = ?',
+                          ('evaluated', submission_id))
+            cursor.execute('COMMIT')
     
     def get_all_results_for_faculty(self, faculty_id=None):
         """Get all evaluation results (for faculty dashboard)"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
-        
-        query = '''
-            SELECT u.username, u.full_name, u.email,
-                   e.experiment_code, e.experiment_name,
-                   s.submission_date,
-                   er.letter_grade, er.numerical_score,
-                   er.mean_deviation, er.pdf_report_path,
-                   er.evaluated_at
-            FROM users u
-            JOIN submissions s ON u.user_id = s.student_id
-            JOIN experiments e ON s.experiment_id = e.experiment_id
-            LEFT JOIN evaluation_results er ON s.submission_id = er.submission_id
-            WHERE u.role = 'student'
-        '''
-        
-        if faculty_id:
-            query += ' AND e.created_by = ?'
-            cursor.execute(query + ' ORDER BY s.submission_date DESC', (faculty_id,))
-        else:
-            cursor.execute(query + ' ORDER BY s.submission_date DESC')
-        
-        columns = [desc[0] for desc in cursor.description]
-        results = [dict(zip(columns, row)) for row in cursor.fetchall()]
-        conn.close()
+        with self._conn() as conn:
+            cursor = conn.cursor()
+            
+            if faculty_id:
+                cursor.execute(_SQL_FACULTY_RESULTS_BY_CREATOR, (faculty_id,))
+            else:
+                cursor.execute(_SQL_FACULTY_RESULTS_ALL)
+            
+            results = [dict(row) for row in cursor.fetchall()]
         return results
     
     # AUDIT LOG
     def log_action(self, user_id, action, details):
-        """Log system action"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
-        cursor.execute('''
-            INSERT INTO audit_log (user_id, action, details)
-            VALUES (?, ?, ?)
-        ''', (user_id, action, details))
-        conn.commit()
-        conn.close()
+        """Log system action (written asynchronously in batches)"""
+        timestamp = datetime.now(timezone.utc).strftime('%Y-%m-%d %H:%M:%S')
+        self._log_queue.put((user_id, action, details, timestamp))
+    
+    def _log_writer(self):
+        """Background loop draining the audit log queue"""
+        flushes = 0
+        while True:
+            rows = [self._log_queue.get()]
+            try:
+                while len(rows) < LOG_BATCH_SIZE:
+                    rows.append(self._log_queue.get(timeout=LOG_FLUSH_INTERVAL))
+            except queue.Empty:
+                pass
+            self._write_log_rows(rows)
+            
+            flushes += 1
+            if flushes % CHECKPOINT_EVERY_N_FLUSHES == 0:
+                self.checkpoint()
+    
+    def flush_audit_log(self):
+        """Write any queued audit log rows and wait for in-flight batches"""
+        rows = []
+        while True:
+            try:
+                rows.append(self._log_queue.get_nowait())
+            except queue.Empty:
+                break
+        if rows:
+            self._write_log_rows(rows)
+        self._log_queue.join()
+    
+    def _write_log_rows(self, rows):
+        """Insert a batch of audit log rows in a single transaction"""
+        try:
+            # A failed attempt is rolled back by _conn, so retrying is safe;
+            # transient errors such as 'database is locked' usually clear quickly
+            delay = LOG_RETRY_BACKOFF
+            for attempt in range(1, LOG_WRITE_ATTEMPTS + 1):
+                try:
+                    with self._conn() as conn:
+                        cursor = conn.cursor()
+                        cursor.execute('BEGIN IMMEDIATE')
+                        cursor.executemany(_SQL_INSERT_AUDIT, rows)
+                        cursor.execute('COMMIT')
+                    return
+                except sqlite3.Error as e:
+                    if attempt == LOG_WRITE_ATTEMPTS:
+                        print(f"Error writing audit log, dropped {len(rows)} rows: {str(e)}")
+                        return
+                    time.sleep(delay)
+                    delay *= 2
+        finally:
+            for _ in rows:
+                self._log_queue.task_done()
+    
+    def checkpoint(self):
+        """Reclaim free pages and truncate the WAL file to bound its growth"""
+        try:
+            with self._conn() as conn:
+                cursor = conn.cursor()
+                cursor.execute('PRAGMA incremental_vacuum(1000)').fetchall()
+                cursor.execute('PRAGMA wal_checkpoint(TRUNCATE)').fetchall()
+        except sqlite3.Error as e:
+            print(f"Error during checkpoint: {str(e)}")
     
     def get_audit_log(self, limit=100):
         """Get recent audit log entries"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            SELECT al.*, u.username, u.full_name
-            FROM audit_log al
-            LEFT JOIN users u ON al.user_id = u.user_id
-            ORDER BY al.timestamp DESC
-            LIMIT ?
-        ''', (limit,))
-        
-        columns = [desc[0] for desc in cursor.description]
-        results = [dict(zip(columns, row)) for row in cursor.fetchall()]
-        conn.close()
+        self.flush_audit_log()
+        with self._conn() as conn:
+            cursor = conn.cursor()
+            
+            cursor.execute('''
+                SELECT al.*, u.username, u.full_name
+                FROM audit_log al
+                LEFT JOIN users u ON al.user_id = u.user_id
+                ORDER BY al.timestamp DESC
+                LIMIT ?
+            ''', (limit,))
+            
+            results = [dict(row) for row in cursor.fetchall()]
         return results
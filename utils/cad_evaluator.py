@@ -1,12 +1,38 @@
 import numpy as np
 import trimesh
-from sklearn.neighbors import NearestNeighbors
-from typing import Dict, Any
+from scipy.linalg.blas import sgemm
+from scipy.spatial import cKDTree
 import plotly.graph_objects as go
 import os
+import hashlib
+import tempfile
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
 import warnings
 warnings.filterwarnings('ignore')
 
+NN_BLOCK_ROWS = 1024  # teacher points per distance-matrix block
+GPU_MIN_POINTS = 8192  # clouds larger than this use CUDA (via torch) when available
+STEP_TOL_LINEAR = 0.01
+STEP_TOL_ANGULAR = 0.5
+# Converted/repaired reference models, keyed by source file content
+MESH_CACHE_DIR = Path(os.getenv("CAD_EVAL_CACHE_DIR", Path.home() / ".cache" / "cad_eval"))
+
+def _file_digest(path, chunk=1 << 20):
+    """Content hash of a file, read in chunks"""
+    h = hashlib.blake2b(digest_size=16)
+    with open(path, 'rb') as f:
+        while (buf := f.read(chunk)):
+            h.update(buf)
+    return h.hexdigest()
+
+def _sorted_percentile(sorted_values, q):
+    """np.percentile (linear interpolation) on an already sorted 1-D array"""
+    pos = (len(sorted_values) - 1) * q / 100
+    lo = int(pos)
+    hi = min(lo + 1, len(sorted_values) - 1)
+    return sorted_values[lo] + (sorted_values[hi] - sorted_values[lo]) * (pos - lo)
+
 class CADEvaluator:
     """CAD Model Evaluation Engine - Cloud Compatible"""
     
@@ -26,6 +52,12 @@ class CADEvaluator:
             'D': (65, 74),
             'F': (0, 64)
         }
+        
+        # Grade letters and their upper bounds in ascending order, for searchsorted
+        self._grade_order = list(self.grading_thresholds)
+        self._grade_bounds = np.array(list(self.grading_thresholds.values()))
+        
+        self._rng = np.random.default_rng()
     
     def repair_mesh_with_meshlab(self, mesh_file, output_file=None):
         """Repair mesh using PyMeshLab to make it watertight"""
@@ -96,8 +128,8 @@ class CADEvaluator:
                 cmin=0,
                 cmax=np.percentile(deviations, 95)
             ),
-            text=[f'Deviation: {d:.4f}' for d in deviations],
-            hovertemplate='<b>Point Accuracy</b><br>X: %{x:.3f}<br>Y: %{y:.3f}<br>Z: %{z:.3f}<br>%{text}<extra></extra>'
+            # Deviation is formatted in the browser from the marker colours
+            hovertemplate='<b>Point Accuracy</b><br>X: %{x:.3f}<br>Y: %{y:.3f}<br>Z: %{z:.3f}<br>Deviation: %{marker.color:.4f}<extra></extra>'
         )])
         
         fig.update_layout(
@@ -114,6 +146,25 @@ class CADEvaluator:
         
         return fig
     
+    def _scene_to_mesh(self, scene, empty_message):
+        """Collapse a trimesh Scene into a single mesh"""
+        if len(scene.geometry) == 0:
+            raise Exception(empty_message)
+        elif len(scene.geometry) == 1:
+            return next(iter(scene.geometry.values()))
+        
+        # Only instances placed with a non-identity transform need a copy;
+        # Scene.dump() would copy every instance before concatenating
+        meshes = []
+        for node in scene.graph.nodes_geometry:
+            transform, geometry_name = scene.graph[node]
+            mesh = scene.geometry[geometry_name]
+            if not np.allclose(transform, np.eye(4)):
+                mesh = mesh.copy()
+                mesh.apply_transform(transform)
+            meshes.append(mesh)
+        return trimesh.util.concatenate(meshes)
+    
     def convert_step_to_mesh(self, step_file, output_file=None):
         """Convert STEP file to mesh format using cascadio"""
         try:
@@ -121,7 +172,7 @@ class CADEvaluator:
             import tempfile
             
             if output_file is None:
-                output_file = step_file.replace('.step', '.obj').replace('.stp', '.obj').replace('.STEP', '.obj').replace('.STP', '.obj')
+                output_file = str(Path(step_file).with_suffix('.obj'))
             
             # Create temporary GLB file
             with tempfile.NamedTemporaryFile(suffix='.glb', delete=False) as tmp_glb:
@@ -132,8 +183,8 @@ class CADEvaluator:
                 result = cascadio.step_to_glb(
                     input_path=step_file,
                     output_path=temp_glb_path,
-                    tol_linear=0.01,
-                    tol_angular=0.5,
+                    tol_linear=STEP_TOL_LINEAR,
+                    tol_angular=STEP_TOL_ANGULAR,
                     tol_relative=False,
                     merge_primitives=True,
                     use_parallel=True
@@ -146,12 +197,7 @@ class CADEvaluator:
                 loaded = trimesh.load(temp_glb_path)
                 
                 if isinstance(loaded, trimesh.Scene):
-                    if len(loaded.geometry) == 0:
-                        raise Exception("No geometry in converted file")
-                    elif len(loaded.geometry) == 1:
-                        mesh = list(loaded.geometry.values())[0]
-                    else:
-                        mesh = loaded.dump(concatenate=True)
+                    mesh = self._scene_to_mesh(loaded, "No geometry in converted file")
                 else:
                     mesh = loaded
                 
@@ -170,25 +216,49 @@ class CADEvaluator:
         except Exception as e:
             raise Exception(f"Error converting STEP file: {str(e)}")
     
-    def load_mesh(self, file_path):
-        """Load mesh from file, converting STEP if necessary"""
+    def _cached_output(self, source_path, tag, produce):
+        """Path of a cached derivative of source_path, calling produce(out_path) on a miss"""
+        cached = MESH_CACHE_DIR / f"{_file_digest(source_path)}_{tag}"
+        if cached.exists():
+            return str(cached)
+        
+        # Write under a unique name and rename, so concurrent evaluations never
+        # read a half-written file
+        MESH_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=MESH_CACHE_DIR, suffix=f"_{tag}")
+        os.close(fd)
+        try:
+            result = produce(tmp_path)
+            if result != tmp_path:
+                # Producer fell back to another file; nothing to cache
+                os.unlink(tmp_path)
+                return result
+            os.replace(tmp_path, cached)
+            return str(cached)
+        except Exception:
+            os.unlink(tmp_path)
+            raise
+    
+    def load_mesh(self, file_path, use_cache=False):
+        """Load mesh from file, converting STEP if necessary (use_cache: reuse conversions)"""
         try:
             # Check if STEP file
             if file_path.lower().endswith(('.step', '.stp')):
                 # Convert to OBJ first
-                converted_path = file_path.replace('.step', '.obj').replace('.stp', '.obj').replace('.STEP', '.obj').replace('.STP', '.obj')
-                self.convert_step_to_mesh(file_path, converted_path)
-                file_path = converted_path
+                if use_cache:
+                    file_path = self._cached_output(
+                        file_path, f"step_{STEP_TOL_LINEAR}_{STEP_TOL_ANGULAR}.obj",
+                        lambda out: self.convert_step_to_mesh(file_path, out)
+                    )
+                else:
+                    converted_path = str(Path(file_path).with_suffix('.obj'))
+                    self.convert_step_to_mesh(file_path, converted_path)
+                    file_path = converted_path
             
             loaded = trimesh.load(file_path)
             
             if isinstance(loaded, trimesh.Scene):
-                if len(loaded.geometry) == 0:
-                    raise Exception("No geometry found in file")
-                elif len(loaded.geometry) == 1:
-                    return list(loaded.geometry.values())[0]
-                else:
-                    return loaded.dump(concatenate=True)
+                return self._scene_to_mesh(loaded, "No geometry found in file")
             return loaded
         except Exception as e:
             raise Exception(f"Error loading mesh: {str(e)}")
@@ -196,46 +266,128 @@ class CADEvaluator:
     def extract_point_cloud(self, mesh, num_points=2048):
         """Extract normalized point cloud from mesh"""
         if mesh.is_watertight:
-            points, _ = trimesh.sample.sample_surface(mesh, num_points)
+            # Evenly spaced samples cover the surface without clumps; rejection can
+            # return fewer than requested, so top up with plain area sampling
+            points, _ = trimesh.sample.sample_surface_even(mesh, num_points)
+            if len(points) < num_points:
+                extra, _ = trimesh.sample.sample_surface(mesh, num_points - len(points))
+                points = np.concatenate([points, extra])
         else:
+            # shuffle=False lets Generator.choice pick distinct indices without
+            # permuting every vertex index first
             if len(mesh.vertices) >= num_points:
-                indices = np.random.choice(len(mesh.vertices), num_points, replace=False)
+                indices = self._rng.choice(len(mesh.vertices), num_points, replace=False, shuffle=False)
                 points = mesh.vertices[indices]
             else:
-                indices = np.random.choice(len(mesh.vertices), num_points, replace=True)
+                indices = self._rng.choice(len(mesh.vertices), num_points, replace=True)
                 points = mesh.vertices[indices]
         
-        # Normalize to unit sphere
-        points = points - np.mean(points, axis=0)
-        scale = np.max(np.sqrt(np.sum(points**2, axis=1)))
+        # Normalize to unit sphere, in place on a single float32 copy
+        points = np.array(points, dtype=np.float32)
+        points -= points.mean(axis=0, dtype=np.float64)
+        # sqrt is monotonic, so take it once on the largest squared norm
+        scale = np.sqrt(np.einsum('ij,ij->i', points, points).max())
         if scale > 0:
-            points = points / scale
+            points /= scale
+        
+        return points
+    
+    def _nearest_distances(self, teacher_points, student_points):
+        """Nearest-neighbour distances in both directions (brute force)"""
+        # |t - s|^2 = |t|^2 + |s|^2 - 2 t.s, so the pairwise work is BLAS matmuls;
+        # at a few thousand points this beats building and walking a k-d tree.
+        # For 3-D points the norms fold into the product itself:
+        # [-2t, |t|^2, 1] . [s, 1, |s|^2] = |t - s|^2, so each block is one k=5
+        # sgemm with no extra passes. Single precision halves memory traffic
+        teacher_aug = np.empty((len(teacher_points), 5), dtype=np.float32)
+        np.multiply(teacher_points, -2, out=teacher_aug[:, :3])
+        teacher_aug[:, 3] = np.einsum('ij,ij->i', teacher_points, teacher_points)
+        teacher_aug[:, 4] = 1
+        
+        student_aug = np.empty((len(student_points), 5), dtype=np.float32)
+        student_aug[:, :3] = student_points
+        student_aug[:, 3] = 1
+        student_aug[:, 4] = np.einsum('ij,ij->i', student_points, student_points)
         
-        return points.astype(np.float32)
+        # Teacher rows are processed in blocks so the working set stays cache-sized
+        # for large clouds; row minima give teacher->student, running column
+        # minima student->teacher
+        min_t2s = np.empty(len(teacher_points), dtype=np.float32)
+        min_s2t = np.full(len(student_points), np.inf, dtype=np.float32)
+        for start in range(0, len(teacher_points), NN_BLOCK_ROWS):
+            stop = start + NN_BLOCK_ROWS
+            d2 = sgemm(1.0, teacher_aug[start:stop], student_aug, trans_b=True)
+            d2.min(axis=1, out=min_t2s[start:stop])
+            np.minimum(min_s2t, d2.min(axis=0), out=min_s2t)
+        
+        # Rounding can dip slightly below zero
+        distances_t2s = np.sqrt(np.maximum(min_t2s, 0, out=min_t2s), out=min_t2s)
+        distances_s2t = np.sqrt(np.maximum(min_s2t, 0, out=min_s2t), out=min_s2t)
+        return distances_t2s, distances_s2t
+    
+    def _nearest_distances_tree(self, teacher_points, student_points):
+        """Nearest-neighbour distances in both directions via k-d trees"""
+        # Sliding-midpoint splits (balanced_tree=False) build much faster than
+        # median splits at little query cost; leaves of 32 are scanned brute force
+        tree_kw = dict(leafsize=32, balanced_tree=False, compact_nodes=False)
+        distances_t2s, _ = cKDTree(student_points, **tree_kw).query(teacher_points, k=1, workers=-1)
+        distances_s2t, _ = cKDTree(teacher_points, **tree_kw).query(student_points, k=1, workers=-1)
+        return distances_t2s, distances_s2t
+    
+    def _nearest_distances_gpu(self, teacher_points, student_points):
+        """Nearest-neighbour distances on a CUDA device, or None if unavailable"""
+        try:
+            import torch
+            
+            if not torch.cuda.is_available():
+                return None
+            
+            teacher = torch.from_numpy(teacher_points).cuda()
+            student = torch.from_numpy(student_points).cuda()
+            d = torch.cdist(teacher, student)
+            return (d.min(dim=1).values.cpu().numpy(),
+                    d.min(dim=0).values.cpu().numpy())
+            
+        except ImportError:
+            return None
+        except Exception as e:
+            # e.g. out of device memory: fall back to the CPU path
+            return None
     
     def compute_geometric_differences(self, teacher_points, student_points):
         """Compute geometric differences between models"""
-        nn_t2s = NearestNeighbors(n_neighbors=1)
-        nn_t2s.fit(student_points)
-        distances_t2s, _ = nn_t2s.kneighbors(teacher_points)
+        teacher_points = np.asarray(teacher_points, dtype=np.float32)
+        student_points = np.asarray(student_points, dtype=np.float32)
         
-        nn_s2t = NearestNeighbors(n_neighbors=1)
-        nn_s2t.fit(teacher_points)
-        distances_s2t, _ = nn_s2t.kneighbors(student_points)
+        # Brute force is quadratic; large clouds go to the GPU or, failing
+        # that, to k-d trees
+        if max(len(teacher_points), len(student_points)) > GPU_MIN_POINTS:
+            distances = self._nearest_distances_gpu(teacher_points, student_points)
+            if distances is None:
+                distances = self._nearest_distances_tree(teacher_points, student_points)
+        else:
+            distances = self._nearest_distances(teacher_points, student_points)
+        distances_t2s, distances_s2t = distances
         
-        distances_t2s = distances_t2s.flatten()
-        distances_s2t = distances_s2t.flatten()
+        # One sort yields max/median/percentiles; mean and std come from one sum
+        # and one dot product instead of separate passes per statistic
+        ds = distances_t2s.astype(np.float64)
+        ds.sort()  # in place on the float64 copy, no second array
+        n = len(ds)
+        mean = ds.sum() / n
+        std = np.sqrt(max(np.dot(ds, ds) / n - mean * mean, 0.0))
         
+        # Plain Python floats: sqlite3 stores NumPy float32 scalars as BLOBs
         return {
             'teacher_to_student_distances': distances_t2s,
             'student_to_teacher_distances': distances_s2t,
-            'mean_deviation': np.mean(distances_t2s),
-            'max_deviation': np.max(distances_t2s),
-            'std_deviation': np.std(distances_t2s),
-            'median_deviation': np.median(distances_t2s),
-            'percentile_95': np.percentile(distances_t2s, 95),
-            'percentile_99': np.percentile(distances_t2s, 99),
-            'hausdorff_distance': max(np.max(distances_t2s), np.max(distances_s2t))
+            'mean_deviation': float(mean),
+            'max_deviation': float(ds[-1]),
+            'std_deviation': float(std),
+            'median_deviation': float(_sorted_percentile(ds, 50)),
+            'percentile_95': float(_sorted_percentile(ds, 95)),
+            'percentile_99': float(_sorted_percentile(ds, 99)),
+            'hausdorff_distance': float(max(ds[-1], distances_s2t.max()))
         }
     
     def calculate_grade(self, geometric_results):
@@ -243,11 +395,9 @@ class CADEvaluator:
         mean_dev = geometric_results['mean_deviation']
         max_dev = geometric_results['max_deviation']
         
-        letter_grade = 'F'
-        for grade, threshold in self.grading_thresholds.items():
-            if mean_dev <= threshold:
-                letter_grade = grade
-                break
+        # First grade whose bound is >= mean_dev (NaN falls through to F)
+        idx = min(int(np.searchsorted(self._grade_bounds, mean_dev)), len(self._grade_order) - 1)
+        letter_grade = self._grade_order[idx]
         
         min_score, max_score = self.detailed_scoring[letter_grade]
         
@@ -257,9 +407,7 @@ class CADEvaluator:
         elif letter_grade == 'F':
             numerical_score = max(0, min_score - (mean_dev * 10))
         else:
-            prev_grade = list(self.grading_thresholds.keys())[
-                list(self.grading_thresholds.keys()).index(letter_grade) - 1
-            ]
+            prev_grade = self._grade_order[idx - 1]
             prev_threshold = self.grading_thresholds[prev_grade]
             curr_threshold = self.grading_thresholds[letter_grade]
             score_factor = (curr_threshold - mean_dev) / (curr_threshold - prev_threshold)
@@ -287,7 +435,7 @@ class CADEvaluator:
         mean_dev = geometric_results['mean_deviation']
         max_dev = geometric_results['max_deviation']
         
-        feedback = f"""
+        parts = [f"""
 📊 CAD MODEL EVALUATION REPORT
 {'='*60}
 
@@ -302,84 +450,112 @@ Grade: {grading_results['letter_grade']} ({grading_results['numerical_score']}%)
 • Hausdorff Distance: {geometric_results['hausdorff_distance']:.4f} units
 
 🎯 DETAILED ASSESSMENT:
-"""
+"""]
         
         if grading_results['letter_grade'] == 'A':
-            feedback += """
+            parts.append("""
 ✅ EXCELLENT WORK!
 • Your model shows exceptional accuracy
 • All dimensions are within professional tolerances
 • Geometric precision meets industry standards
 • Continue this level of attention to detail!
-"""
+""")
         elif grading_results['letter_grade'] == 'B':
-            feedback += f"""
+            parts.append(f"""
 ✅ GOOD WORK with room for improvement:
 • Most dimensions are accurate (within {self.grading_thresholds['B']:.1f} units)
 • Some areas need refinement
 • Focus on improving precision in critical dimensions
-"""
+""")
         elif grading_results['letter_grade'] == 'C':
-            feedback += f"""
+            parts.append(f"""
 ⚠️ ACCEPTABLE but needs significant improvement:
 • Basic geometry is correct but lacks precision
 • Several dimensions exceed acceptable tolerances
 • Mean deviation of {mean_dev:.3f} needs to be reduced
 • Review modeling techniques and double-check dimensions
-"""
+""")
         elif grading_results['letter_grade'] == 'D':
-            feedback += f"""
+            parts.append(f"""
 ⚠️ NEEDS MAJOR REVISION:
 • Significant geometric inaccuracies detected
 • Multiple dimensions are far from specifications
 • Mean deviation of {mean_dev:.3f} is too high
 • Consider starting over with careful attention
-"""
+""")
         else:
-            feedback += f"""
+            parts.append(f"""
 ❌ UNSATISFACTORY - MAJOR ISSUES:
 • Model has serious geometric problems
 • Mean deviation of {mean_dev:.3f} indicates fundamental errors
 • Max deviation of {max_dev:.3f} suggests missing features
 • Please review assignment requirements
-"""
+""")
         
-        feedback += "\n🔧 IMPROVEMENT RECOMMENDATIONS:\n"
+        parts.append("\n🔧 IMPROVEMENT RECOMMENDATIONS:\n")
         
         if geometric_results['std_deviation'] > 0.5:
-            feedback += "• High variation - focus on consistent precision\n"
+            parts.append("• High variation - focus on consistent precision\n")
         
         if max_dev > 2 * mean_dev:
-            feedback += "• Some areas have major errors - check features\n"
+            parts.append("• Some areas have major errors - check features\n")
         
         if geometric_results['percentile_95'] > self.grading_thresholds['C']:
-            feedback += "• 95% of points should be more accurate\n"
+            parts.append("• 95% of points should be more accurate\n")
         
-        feedback += f"""
+        parts.append(f"""
 📋 GRADING SCALE:
 • A: ≤{self.grading_thresholds['A']:.1f} units
 • B: ≤{self.grading_thresholds['B']:.1f} units
 • C: ≤{self.grading_thresholds['C']:.1f} units
 • D: ≤{self.grading_thresholds['D']:.1f} units
-"""
+""")
         
-        return feedback
+        return "".join(parts)
     
-    def evaluate(self, teacher_model_path, student_model_path, num_points=2048, repair_mesh=False):
-        """Complete evaluation workflow"""
-        try:
-            # Optional mesh repair
-            if repair_mesh:
-                teacher_model_path = self.repair_mesh_with_meshlab(teacher_model_path)
-                student_model_path = self.repair_mesh_with_meshlab(student_model_path)
+    def _prepare_points(self, model_path, num_points, repair_mesh=False, use_cache=False):
+        """Optionally repair, then load and sample one model"""
+        mesh = None
+        if repair_mesh:
+            # Clean models need no repair; sample the already loaded mesh
+            mesh = self.load_mesh(model_path, use_cache)
+            if mesh.is_watertight and mesh.is_winding_consistent:
+                return self.extract_point_cloud(mesh, num_points)
             
-            # Load meshes
-            teacher_mesh = self.load_mesh(teacher_model_path)
-            student_mesh = self.load_mesh(student_model_path)
+            if use_cache:
+                repaired_path = self._cached_output(
+                    model_path, f"repaired{Path(model_path).suffix}",
+                    lambda out: self.repair_mesh_with_meshlab(model_path, out)
+                )
+            else:
+                repaired_path = self.repair_mesh_with_meshlab(model_path)
             
-            # Extract point clouds
-            teacher_points = self.extract_point_cloud(teacher_mesh, num_points)
-            student_points = self.extract_point_cloud(student_mesh, num_points)
+            # Repair falls back to the input path when it cannot run
+            if repaired_path != model_path:
+                model_path = repaired_path
+                mesh = None
+        
+        if mesh is None:
+            mesh = self.load_mesh(model_path, use_cache)
+        return self.extract_point_cloud(mesh, num_points)
+    
+    def evaluate(self, teacher_model_path, student_model_path, num_points=2048, repair_mesh=False,
+                 return_feedback=True):
+        """Complete evaluation workflow (return_feedback=False skips the feedback text)"""
+        try:
+            # Repair, load and sample both models concurrently; parsing and
+            # meshlab/cascadio work mostly runs in C extensions
+            with ThreadPoolExecutor(max_workers=2) as executor:
+                # The reference model is shared by every submission, so its
+                # conversion and repair are cached by content
+                teacher_future = executor.submit(
+                    self._prepare_points, teacher_model_path, num_points, repair_mesh, True
+                )
+                student_future = executor.submit(
+                    self._prepare_points, student_model_path, num_points, repair_mesh
+                )
+                teacher_points = teacher_future.result()
+                student_points = student_future.result()
             
             # Compute differences
             geometric_results = self.compute_geometric_differences(
@@ -390,7 +566,9 @@ Grade: {grading_results['letter_grade']} ({grading_results['numerical_score']}%)
             grading_results = self.calculate_grade(geometric_results)
             
             # Generate feedback
-            feedback = self.generate_feedback(grading_results, geometric_results)
+            feedback = None
+            if return_feedback:
+                feedback = self.generate_feedback(grading_results, geometric_results)
             
             # Create 3D heatmap visualization
             heatmap = self.create_evaluation_heatmap(
@@ -2,7 +2,61 @@ import os
 import shutil
 from pathlib import Path
 from datetime import datetime
-import hashlib
+import itertools
+import time
+
+UPLOAD_CHUNK_SIZE = 1 << 20  # 1 MiB
+
+_VALID_CAD_EXTS = frozenset({'.obj', '.stl', '.ply', '.off', '.step', '.stp'})
+_STEP_EXTS = frozenset({'.step', '.stp'})
+_MAX_CAD_SIZE = 100 * 1024 * 1024
+_MAX_STEP_SIZE = 200 * 1024 * 1024
+
+# Per-process sequence so names stay unique even within one clock tick
+_fname_counter = itertools.count()
+
+def _unique_stamp():
+    """Filename stamp: nanosecond time plus a counter (second-resolution names collided)"""
+    return f"{time.time_ns()}_{next(_fname_counter)}"
+
+def stream_to_path(uploaded_file, dest_path, chunk=UPLOAD_CHUNK_SIZE, max_bytes=None):
+    """Write an uploaded file to disk in chunks instead of buffering it whole"""
+    uploaded_file.seek(0)
+    if max_bytes is None:
+        with open(dest_path, 'wb') as f:
+            shutil.copyfileobj(uploaded_file, f, length=chunk)
+        return
+    
+    # Count while copying and stop as soon as the limit is passed, so an
+    # oversized upload never lands on disk in full
+    written = 0
+    with open(dest_path, 'wb') as f:
+        while data := uploaded_file.read(chunk):
+            written += len(data)
+            if written > max_bytes:
+                break
+            f.write(data)
+    
+    if written > max_bytes:
+        os.unlink(dest_path)
+        raise ValueError(f"File too large (max {max_bytes // (1024 * 1024)}MB)")
+
+def _dir_size(root):
+    """Total size of the files under root, using the stats scandir already has"""
+    total = 0
+    stack = [root]
+    while stack:
+        try:
+            it = os.scandir(stack.pop())
+        except OSError:
+            continue
+        with it:
+            for entry in it:
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append(entry.path)
+                else:
+                    total += entry.stat(follow_symlinks=False).st_size
+    return total
 
 class FileManager:
     """Cloud-compatible file management system"""
@@ -13,32 +67,47 @@ class FileManager:
         self.submissions_dir = self.base_dir / 'submissions'
         self.reports_dir = self.base_dir / 'reports'
         
+        # Directories known to exist, so hot save paths skip mkdir
+        self._dir_cache = set()
+        
         # Create directories
         self._setup_directories()
     
     def _setup_directories(self):
         """Create necessary directories"""
-        self.experiments_dir.mkdir(parents=True, exist_ok=True)
-        self.submissions_dir.mkdir(parents=True, exist_ok=True)
-        self.reports_dir.mkdir(parents=True, exist_ok=True)
+        self._ensure_dir(self.experiments_dir)
+        self._ensure_dir(self.submissions_dir)
+        self._ensure_dir(self.reports_dir)
+    
+    def _ensure_dir(self, path):
+        """Create a directory (and parents) unless this instance already did"""
+        key = str(path)
+        if key in self._dir_cache:
+            return
+        path.mkdir(parents=True, exist_ok=True)
+        self._dir_cache.add(key)
+    
+    def _forget_submission_dirs(self):
+        """Drop cached submission directories so pruned ones are recreated on the next save"""
+        prefix = str(self.submissions_dir) + os.sep
+        self._dir_cache.difference_update([d for d in list(self._dir_cache) if d.startswith(prefix)])
     
     def save_experiment_file(self, uploaded_file, experiment_code):
         """Save faculty-uploaded experiment reference model"""
         try:
             # Create experiment-specific directory
             exp_dir = self.experiments_dir / experiment_code
-            exp_dir.mkdir(parents=True, exist_ok=True)
+            self._ensure_dir(exp_dir)
             
             # Generate safe filename
-            timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+            timestamp = _unique_stamp()
             file_ext = Path(uploaded_file.name).suffix
             filename = f"reference_model_{timestamp}{file_ext}"
             
             file_path = exp_dir / filename
             
             # Save file
-            with open(file_path, 'wb') as f:
-                f.write(uploaded_file.getbuffer())
+            stream_to_path(uploaded_file, file_path)
             
             return str(file_path), filename
             
@@ -48,40 +117,54 @@ class FileManager:
     def save_student_submission(self, uploaded_file, experiment_code, student_username):
         """Save student submission (temporary)"""
         try:
+            # Validate the format before anything touches disk
+            file_ext = os.path.splitext(uploaded_file.name)[1]
+            ext = file_ext.lower()
+            if ext not in _VALID_CAD_EXTS:
+                raise ValueError(f"Unsupported file format: {ext}")
+            
             # Create submission directory
             submission_dir = self.submissions_dir / experiment_code / student_username
-            submission_dir.mkdir(parents=True, exist_ok=True)
+            self._ensure_dir(submission_dir)
             
             # Generate filename with timestamp
-            timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-            file_ext = Path(uploaded_file.name).suffix
+            timestamp = _unique_stamp()
             filename = f"submission_{timestamp}{file_ext}"
             
             file_path = submission_dir / filename
             
-            # Save file
-            with open(file_path, 'wb') as f:
-                f.write(uploaded_file.getbuffer())
+            # Save file, enforcing the size limit while streaming
+            max_size = _MAX_STEP_SIZE if ext in _STEP_EXTS else _MAX_CAD_SIZE
+            stream_to_path(uploaded_file, file_path, max_bytes=max_size)
             
             return str(file_path), filename
             
         except Exception as e:
             raise Exception(f"Error saving submission: {str(e)}")
     
+    def pdf_report_path(self, experiment_code, student_username):
+        """Get a new permanent report path (creates the directory, not the file)"""
+        # Create report directory
+        report_dir = self.reports_dir / experiment_code
+        self._ensure_dir(report_dir)
+        
+        # Generate report filename
+        timestamp = _unique_stamp()
+        report_filename = f"{student_username}_{timestamp}_report.pdf"
+        return report_dir / report_filename
+    
     def save_pdf_report(self, pdf_path, experiment_code, student_username):
         """Save PDF report to permanent storage"""
         try:
-            # Create report directory
-            report_dir = self.reports_dir / experiment_code
-            report_dir.mkdir(parents=True, exist_ok=True)
+            report_path = self.pdf_report_path(experiment_code, student_username)
             
-            # Generate report filename
-            timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-            report_filename = f"{student_username}_{timestamp}_report.pdf"
-            report_path = report_dir / report_filename
-            
-            # Copy PDF to permanent location
-            shutil.copy2(pdf_path, report_path)
+            # Hard-link into permanent storage (no data copied); across
+            # filesystems fall back to copyfile, which uses the kernel's fast
+            # copy path. The report is a fresh artifact, so metadata is not kept
+            try:
+                os.link(pdf_path, report_path)
+            except OSError:
+                shutil.copyfile(pdf_path, report_path)
             
             return str(report_path)
             
@@ -100,10 +183,20 @@ class FileManager:
             # Delete the file
             os.remove(submission_file_path)
             
-            # Clean up empty directories
-            parent_dir = Path(submission_file_path).parent
-            if parent_dir.exists() and not any(parent_dir.iterdir()):
-                parent_dir.rmdir()
+            # Clean up empty directories, student dir then experiment dir;
+            # rmdir refuses non-empty ones, so no listing is needed
+            root = self.submissions_dir.resolve()
+            parent_dir = Path(submission_file_path).resolve().parent
+            pruned = False
+            while root in parent_dir.parents:
+                try:
+                    os.rmdir(parent_dir)
+                except OSError:
+                    break
+                pruned = True
+                parent_dir = parent_dir.parent
+            if pruned:
+                self._forget_submission_dirs()
             
             # Double-check it's really gone
             if os.path.exists(submission_file_path):
@@ -116,19 +209,28 @@ class FileManager:
             print(error_msg)
             return False, error_msg
     
-    def get_experiment_reference_path(self, experiment_id, reference_filename):
+    def get_experiment_reference_path(self, experiment_code, reference_filename):
         """Get full path to experiment reference model"""
         # This assumes the path is stored in database
-        # Return the path as-is if it exists, otherwise search
+        # Return the path as-is if it exists, otherwise look in the experiment's directory
         if os.path.exists(reference_filename):
             return reference_filename
         
-        # Search in experiments directory
-        for exp_dir in self.experiments_dir.iterdir():
-            if exp_dir.is_dir():
-                for file in exp_dir.iterdir():
-                    if file.name == reference_filename or str(file) == reference_filename:
-                        return str(file)
+        # Reference models live directly under experiments/<experiment_code>/
+        exp_dir = self.experiments_dir / experiment_code
+        target = Path(reference_filename).name
+        candidate = exp_dir / target
+        if candidate.exists():
+            return str(candidate)
+        
+        # Fall back to a case-insensitive match within that one directory
+        try:
+            with os.scandir(exp_dir) as it:
+                for entry in it:
+                    if entry.name.lower() == target.lower() and entry.is_file():
+                        return entry.path
+        except OSError:
+            pass
         
         raise FileNotFoundError(f"Reference model not found: {reference_filename}")
     
@@ -137,55 +239,63 @@ class FileManager:
         cutoff_time = datetime.now().timestamp() - (days_old * 24 * 3600)
         deleted_count = 0
         
-        try:
-            for submission_path in self.submissions_dir.rglob('*'):
-                if submission_path.is_file():
-                    file_time = submission_path.stat().st_mtime
-                    if file_time < cutoff_time:
-                        submission_path.unlink()
+        def _cleanup(dirpath):
+            # One scandir pass: DirEntry carries the stat, and emptied
+            # subdirectories are removed on the way back up
+            nonlocal deleted_count
+            with os.scandir(dirpath) as it:
+                for entry in it:
+                    if entry.is_dir(follow_symlinks=False):
+                        _cleanup(entry.path)
+                        try:
+                            os.rmdir(entry.path)
+                        except OSError:
+                            pass  # not empty
+                    elif entry.stat(follow_symlinks=False).st_mtime < cutoff_time:
+                        os.unlink(entry.path)
                         deleted_count += 1
-            
-            # Clean up empty directories
-            for dirpath in sorted(self.submissions_dir.rglob('*'), reverse=True):
-                if dirpath.is_dir() and not any(dirpath.iterdir()):
-                    dirpath.rmdir()
-            
+        
+        try:
+            _cleanup(self.submissions_dir)
             return deleted_count
             
         except Exception as e:
             print(f"Error during cleanup: {str(e)}")
             return deleted_count
+        
+        finally:
+            self._forget_submission_dirs()
     
     def get_file_info(self, file_path):
         """Get file information"""
         try:
-            path = Path(file_path)
-            if path.exists():
-                stat = path.stat()
-                return {
-                    'size': stat.st_size,
-                    'size_mb': round(stat.st_size / (1024 * 1024), 2),
-                    'created': datetime.fromtimestamp(stat.st_ctime),
-                    'modified': datetime.fromtimestamp(stat.st_mtime),
-                    'extension': path.suffix,
-                    'name': path.name
-                }
-            return None
-        except Exception as e:
+            # One stat call doubles as the existence check
+            stat = os.stat(file_path)
+        except (OSError, TypeError, ValueError):
             return None
+        
+        name = os.path.basename(file_path)
+        return {
+            'size': stat.st_size,
+            'size_mb': round(stat.st_size / (1024 * 1024), 2),
+            'created': datetime.fromtimestamp(stat.st_ctime),
+            'modified': datetime.fromtimestamp(stat.st_mtime),
+            'extension': os.path.splitext(name)[1],
+            'name': name
+        }
     
     def validate_cad_file(self, file_path):
         """Validate CAD file format"""
-        valid_extensions = ['.obj', '.stl', '.ply', '.off', '.step', '.stp']
-        ext = Path(file_path).suffix.lower()
+        ext = os.path.splitext(file_path)[1].lower()
         
-        if ext not in valid_extensions:
+        # Reject on extension before touching the filesystem
+        if ext not in _VALID_CAD_EXTS:
             return False, f"Unsupported file format: {ext}"
         
         # Check file size (max 200MB for STEP, 100MB for others)
-        file_size = Path(file_path).stat().st_size
-        max_size = 200 * 1024 * 1024 if ext in ['.step', '.stp'] else 100 * 1024 * 1024
-        max_size_mb = 200 if ext in ['.step', '.stp'] else 100
+        file_size = os.path.getsize(file_path)
+        max_size = _MAX_STEP_SIZE if ext in _STEP_EXTS else _MAX_CAD_SIZE
+        max_size_mb = max_size // (1024 * 1024)
         
         if file_size > max_size:
             return False, f"File too large: {round(file_size/(1024*1024), 2)}MB (max {max_size_mb}MB)"
@@ -207,7 +317,7 @@ class FileManager:
                 (self.submissions_dir, 'submissions'),
                 (self.reports_dir, 'reports')
             ]:
-                size = sum(f.stat().st_size for f in directory.rglob('*') if f.is_file())
+                size = _dir_size(directory)
                 stats[key] = round(size / (1024 * 1024), 2)  # MB
             
             stats['total'] = sum([stats['experiments'], stats['submissions'], stats['reports']])
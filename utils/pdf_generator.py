@@ -1,71 +1,152 @@
-from reportlab.lib.pagesizes import letter, A4
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib.units import inch
-from reportlab.lib import colors
-from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer, PageBreak, Image
-from reportlab.lib.enums import TA_CENTER, TA_LEFT, TA_JUSTIFY
-from reportlab.pdfgen import canvas
+from xml.sax.saxutils import escape
 from datetime import datetime
+from types import SimpleNamespace
 import io
+import multiprocessing
 from pathlib import Path
+from functools import lru_cache
+from concurrent.futures import ProcessPoolExecutor
+
+# reportlab is imported on first use (see _report_kit), so importing this
+# module stays cheap for callers that never render a report
+
+_TITLE_TEXT = "CAD MODEL EVALUATION REPORT"
+
+_GRADE_COLOR = {
+    'A': '#2ca02c',  # Green
+    'B': '#17becf',  # Cyan
+    'C': '#ff7f0e',  # Orange
+    'D': '#d62728',  # Red
+    'F': '#8b0000'   # Dark Red
+}
+
+# Status icon keyed by (value <= threshold, value <= 2 * threshold)
+_STATUS_ICON = {
+    (True, True): '✓',
+    (True, False): '✓',  # only reachable with a negative threshold
+    (False, True): '⚠',
+    (False, False): '✗'
+}
+
+@lru_cache(maxsize=1)
+def _report_kit():
+    """Import reportlab and build the styles and tables shared by every report (once)"""
+    from reportlab.lib.pagesizes import letter
+    from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+    from reportlab.lib import colors
+    from reportlab.platypus import TableStyle
+    from reportlab.lib.enums import TA_CENTER, TA_JUSTIFY
+    
+    styles = getSampleStyleSheet()
+    styles.add(ParagraphStyle(
+        name='CustomTitle',
+        parent=styles['Heading1'],
+        fontSize=24,
+        textColor=colors.HexColor('#1f77b4'),
+        spaceAfter=30,
+        alignment=TA_CENTER,
+        fontName='Helvetica-Bold'
+    ))
+    
+    styles.add(ParagraphStyle(
+        name='CustomHeading',
+        parent=styles['Heading2'],
+        fontSize=16,
+        textColor=colors.HexColor('#2ca02c'),
+        spaceAfter=12,
+        spaceBefore=12,
+        fontName='Helvetica-Bold'
+    ))
+    
+    styles.add(ParagraphStyle(
+        name='CustomBody',
+        parent=styles['Normal'],
+        fontSize=11,
+        spaceAfter=8,
+        alignment=TA_JUSTIFY
+    ))
+    
+    info_table_style = TableStyle([
+        ('BACKGROUND', (0, 0), (0, -1), colors.HexColor('#e8f4f8')),
+        ('TEXTCOLOR', (0, 0), (-1, -1), colors.black),
+        ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+        ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
+        ('FONTSIZE', (0, 0), (-1, -1), 10),
+        ('BOTTOMPADDING', (0, 0), (-1, -1), 8),
+        ('GRID', (0, 0), (-1, -1), 1, colors.grey)
+    ])
+    
+    analysis_table_style = TableStyle([
+        ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#1f77b4')),
+        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+        ('FONTSIZE', (0, 0), (-1, 0), 11),
+        ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+        ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
+        ('GRID', (0, 0), (-1, -1), 1, colors.black)
+    ])
+    
+    # The grading scale rows and style are the same in every report
+    scale_data = (
+        ('Grade', 'Deviation Range', 'Score Range'),
+        ('A', '≤ 0.1 units', '95-100%'),
+        ('B', '≤ 0.5 units', '85-94%'),
+        ('C', '≤ 1.0 units', '75-84%'),
+        ('D', '≤ 2.0 units', '65-74%'),
+        ('F', '> 2.0 units', '0-64%')
+    )
+    scale_table_style = TableStyle([
+        ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#2ca02c')),
+        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+        ('FONTSIZE', (0, 0), (-1, -1), 10),
+        ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+        ('GRID', (0, 0), (-1, -1), 1, colors.black),
+        ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.lightgrey])
+    ])
+    
+    return SimpleNamespace(
+        styles=styles,
+        doc_kw=dict(pagesize=letter, rightMargin=72, leftMargin=72, topMargin=72, bottomMargin=18),
+        info_table_style=info_table_style,
+        analysis_table_style=analysis_table_style,
+        scale_data=scale_data,
+        scale_table_style=scale_table_style
+    )
+
+def _render_one(job):
+    """Render one report in a worker process; job is (output_path, student_info, experiment_info, evaluation_results)"""
+    return PDFReportGenerator().generate_evaluation_report(*job)
 
 class PDFReportGenerator:
     """Generate professional PDF evaluation reports"""
     
-    def __init__(self):
-        self.styles = getSampleStyleSheet()
-        self._setup_custom_styles()
-    
-    def _setup_custom_styles(self):
-        """Setup custom paragraph styles"""
-        self.styles.add(ParagraphStyle(
-            name='CustomTitle',
-            parent=self.styles['Heading1'],
-            fontSize=24,
-            textColor=colors.HexColor('#1f77b4'),
-            spaceAfter=30,
-            alignment=TA_CENTER,
-            fontName='Helvetica-Bold'
-        ))
-        
-        self.styles.add(ParagraphStyle(
-            name='CustomHeading',
-            parent=self.styles['Heading2'],
-            fontSize=16,
-            textColor=colors.HexColor('#2ca02c'),
-            spaceAfter=12,
-            spaceBefore=12,
-            fontName='Helvetica-Bold'
-        ))
-        
-        self.styles.add(ParagraphStyle(
-            name='CustomBody',
-            parent=self.styles['Normal'],
-            fontSize=11,
-            spaceAfter=8,
-            alignment=TA_JUSTIFY
-        ))
+    @property
+    def styles(self):
+        """Shared, read-only stylesheet (loads reportlab on first access)"""
+        return _report_kit().styles
     
     def generate_evaluation_report(self, output_path, student_info, experiment_info, 
                                    evaluation_results):
         """Generate complete evaluation report PDF"""
+        from reportlab.lib.units import inch
+        from reportlab.platypus import SimpleDocTemplate, Table, Paragraph, Spacer
         
-        # Ensure output directory exists
-        Path(output_path).parent.mkdir(parents=True, exist_ok=True)
+        kit = _report_kit()
+        
+        # Render into memory; the file is written in one go at the end
+        buf = io.BytesIO()
         
         # Create PDF document
-        doc = SimpleDocTemplate(output_path, pagesize=letter,
-                               rightMargin=72, leftMargin=72,
-                               topMargin=72, bottomMargin=18)
+        doc = SimpleDocTemplate(buf, **kit.doc_kw)
         
         # Container for PDF elements
         story = []
         
         # Title
-        title = Paragraph(
-            "CAD MODEL EVALUATION REPORT",
-            self.styles['CustomTitle']
-        )
+        title = Paragraph(_TITLE_TEXT, self.styles['CustomTitle'])
         story.append(title)
         story.append(Spacer(1, 0.3*inch))
         
@@ -80,37 +161,26 @@ class PDFReportGenerator:
         ]
         
         student_table = Table(student_data, colWidths=[2*inch, 4*inch])
-        student_table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (0, -1), colors.HexColor('#e8f4f8')),
-            ('TEXTCOLOR', (0, 0), (-1, -1), colors.black),
-            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-            ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, -1), 10),
-            ('BOTTOMPADDING', (0, 0), (-1, -1), 8),
-            ('GRID', (0, 0), (-1, -1), 1, colors.grey)
-        ]))
+        student_table.setStyle(kit.info_table_style)
         story.append(student_table)
         story.append(Spacer(1, 0.3*inch))
         
         # Experiment Information Section
         story.append(Paragraph("Experiment Information", self.styles['CustomHeading']))
         
+        # Truncate long descriptions only
+        description = experiment_info.get('description') or 'N/A'
+        if len(description) > 100:
+            description = description[:100] + '…'
+        
         experiment_data = [
             ['Experiment Code:', experiment_info.get('experiment_code', 'N/A')],
             ['Experiment Name:', experiment_info.get('experiment_name', 'N/A')],
-            ['Description:', experiment_info.get('description', 'N/A')[:100] + '...']
+            ['Description:', description]
         ]
         
         experiment_table = Table(experiment_data, colWidths=[2*inch, 4*inch])
-        experiment_table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (0, -1), colors.HexColor('#e8f4f8')),
-            ('TEXTCOLOR', (0, 0), (-1, -1), colors.black),
-            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-            ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, -1), 10),
-            ('BOTTOMPADDING', (0, 0), (-1, -1), 8),
-            ('GRID', (0, 0), (-1, -1), 1, colors.grey)
-        ]))
+        experiment_table.setStyle(kit.info_table_style)
         story.append(experiment_table)
         story.append(Spacer(1, 0.4*inch))
         
@@ -132,68 +202,44 @@ class PDFReportGenerator:
         # Geometric Analysis Results
         story.append(Paragraph("Geometric Accuracy Analysis", self.styles['CustomHeading']))
         
-        geo_analysis = evaluation_results.get('geometric_analysis', {})
+        geo_analysis = evaluation_results.get('geometric_analysis') or {}
+        mean_dev, max_dev, std_dev, p95, hausdorff = (
+            geo_analysis.get(k, 0) for k in
+            ('mean_deviation', 'max_deviation', 'std_deviation', 'percentile_95', 'hausdorff_distance')
+        )
         
         analysis_data = [
             ['Metric', 'Value', 'Status'],
-            ['Mean Deviation', f"{geo_analysis.get('mean_deviation', 0):.4f} units", 
-             self._get_status_icon(geo_analysis.get('mean_deviation', 0), 0.5)],
-            ['Maximum Deviation', f"{geo_analysis.get('max_deviation', 0):.4f} units",
-             self._get_status_icon(geo_analysis.get('max_deviation', 0), 2.0)],
-            ['Standard Deviation', f"{geo_analysis.get('std_deviation', 0):.4f} units", '-'],
-            ['95th Percentile', f"{geo_analysis.get('percentile_95', 0):.4f} units", '-'],
-            ['Hausdorff Distance', f"{geo_analysis.get('hausdorff_distance', 0):.4f} units", '-']
+            ['Mean Deviation', f"{mean_dev:.4f} units", self._get_status_icon(mean_dev, 0.5)],
+            ['Maximum Deviation', f"{max_dev:.4f} units", self._get_status_icon(max_dev, 2.0)],
+            ['Standard Deviation', f"{std_dev:.4f} units", '-'],
+            ['95th Percentile', f"{p95:.4f} units", '-'],
+            ['Hausdorff Distance', f"{hausdorff:.4f} units", '-']
         ]
         
         analysis_table = Table(analysis_data, colWidths=[2.5*inch, 2*inch, 1.5*inch])
-        analysis_table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#1f77b4')),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, 0), 11),
-            ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-            ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
-            ('GRID', (0, 0), (-1, -1), 1, colors.black)
-        ]))
+        analysis_table.setStyle(kit.analysis_table_style)
         story.append(analysis_table)
         story.append(Spacer(1, 0.3*inch))
         
         # Detailed Feedback
         story.append(Paragraph("Detailed Feedback", self.styles['CustomHeading']))
         
-        feedback_text = evaluation_results.get('feedback', 'No feedback available')
-        # Convert feedback to HTML-safe format
-        feedback_paragraphs = feedback_text.split('\n')
-        for para in feedback_paragraphs:
-            if para.strip():
-                story.append(Paragraph(para.strip(), self.styles['CustomBody']))
+        feedback_text = evaluation_results.get('feedback') or 'No feedback available'
+        # Escape to HTML-safe text and lay the lines out as one paragraph
+        feedback_lines = [escape(line.strip()) for line in feedback_text.split('\n') if line.strip()]
+        if feedback_lines:
+            story.append(Paragraph('<br/>'.join(feedback_lines), self.styles['CustomBody']))
         
         story.append(Spacer(1, 0.3*inch))
         
         # Grading Scale Reference
         story.append(Paragraph("Grading Scale Reference", self.styles['CustomHeading']))
         
-        scale_data = [
-            ['Grade', 'Deviation Range', 'Score Range'],
-            ['A', '≤ 0.1 units', '95-100%'],
-            ['B', '≤ 0.5 units', '85-94%'],
-            ['C', '≤ 1.0 units', '75-84%'],
-            ['D', '≤ 2.0 units', '65-74%'],
-            ['F', '> 2.0 units', '0-64%']
-        ]
-        
-        scale_table = Table(scale_data, colWidths=[1.5*inch, 2.5*inch, 2*inch])
-        scale_table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#2ca02c')),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, -1), 10),
-            ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-            ('GRID', (0, 0), (-1, -1), 1, colors.black),
-            ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.lightgrey])
-        ]))
+        # A fresh Table per report: layout mutates a Table's internal state,
+        # so one instance must not be shared by concurrent builds
+        scale_table = Table([list(row) for row in kit.scale_data], colWidths=[1.5*inch, 2.5*inch, 2*inch])
+        scale_table.setStyle(kit.scale_table_style)
         story.append(scale_table)
         
         # Footer
@@ -205,24 +251,30 @@ class PDFReportGenerator:
         # Build PDF
         doc.build(story)
         
+        # Ensure output directory exists, then write the finished bytes
+        Path(output_path).parent.mkdir(parents=True, exist_ok=True)
+        with open(output_path, 'wb') as f:
+            f.write(buf.getbuffer())
+        
         return output_path
     
-    def _get_grade_color(self, grade):
+    def generate_many(self, jobs):
+        """Generate several independent reports in parallel, one process per CPU"""
+        jobs = list(jobs)
+        if len(jobs) <= 1:
+            return [self.generate_evaluation_report(*job) for job in jobs]
+        
+        # Don't fork from a threaded server (children can inherit held locks)
+        start_method = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+        with ProcessPoolExecutor(mp_context=multiprocessing.get_context(start_method)) as executor:
+            return list(executor.map(_render_one, jobs, chunksize=4))
+    
+    @staticmethod
+    def _get_grade_color(grade):
         """Get color code for grade"""
-        colors_map = {
-            'A': '#2ca02c',  # Green
-            'B': '#17becf',  # Cyan
-            'C': '#ff7f0e',  # Orange
-            'D': '#d62728',  # Red
-            'F': '#8b0000'   # Dark Red
-        }
-        return colors_map.get(grade, '#000000')
+        return _GRADE_COLOR.get(grade, '#000000')
     
-    def _get_status_icon(self, value, threshold):
+    @staticmethod
+    def _get_status_icon(value, threshold):
         """Get status icon based on threshold"""
-        if value <= threshold:
-            return '✓'
-        elif value <= threshold * 2:
-            return '⚠'
-        else:
-            return '✗'
+        return _STATUS_ICON[(value <= threshold, value <= threshold * 2)]